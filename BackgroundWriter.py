@@ -0,0 +1,105 @@
+import threading
+import time
+import traceback
+from collections import deque
+
+
+class BackgroundWriter(object):
+    """
+    Runs write operations on a background thread so that the evolution loop does not wait for the disk.
+
+    Tasks are kept in a bounded queue.  When the queue is full a new task either waits for room ("block") or is
+    discarded ("drop").  The queue is a deque polled by the writer thread, no locks are shared with the evolution
+    thread, so a signal handler running on that thread can always flush the queue safely
+    """
+
+    POLICIES = ("block", "drop")
+
+    def __init__(self, queueSize=16, policy="block", pollInterval=0.01):
+        """
+        :param queueSize: the maximum number of writes waiting to be run
+        :type queueSize: int
+        :param policy: what to do with a write when the queue is full, "block" or "drop"
+        :type policy: str
+        :param pollInterval: the number of seconds to wait between checks of an empty queue
+        :type pollInterval: float
+        """
+        if policy not in self.POLICIES:
+            raise Exception("Unknown writer policy: " + str(policy))
+        if queueSize < 1:
+            raise Exception("queueSize must be at least 1")
+        self.queueSize = queueSize
+        self.policy = policy
+        self.pollInterval = pollInterval
+
+        self.tasks = deque()
+        self.busy = False
+        self.stopping = False
+
+        self.written = 0
+        self.dropped = 0
+        self.blocked = 0
+        self.failed = 0
+
+        self.thread = threading.Thread(target=self.work)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def submit(self, function, *args):
+        """
+        Run function(*args) on the writer thread.  The arguments must not be changed after they are submitted
+        :return: False if the write was dropped
+        """
+        if len(self.tasks) >= self.queueSize:
+            if self.policy == "drop":
+                self.dropped += 1
+                return False
+            self.blocked += 1
+            while len(self.tasks) >= self.queueSize:
+                time.sleep(self.pollInterval)
+        self.tasks.append((function, args))
+        return True
+
+    def work(self):
+        while True:
+            self.busy = True
+            try:
+                function, args = self.tasks.popleft()
+            except IndexError:
+                self.busy = False
+                if self.stopping:
+                    return
+                time.sleep(self.pollInterval)
+                continue
+            try:
+                function(*args)
+                self.written += 1
+            except Exception:
+                self.failed += 1
+                traceback.print_exc()
+            self.busy = False
+
+    def flush(self):
+        """
+        Wait until every submitted write has finished
+        """
+        while len(self.tasks) > 0 or self.busy:
+            time.sleep(self.pollInterval)
+
+    def close(self, flush=True):
+        """
+        Stop the writer thread
+        :param flush: if True, wait for the submitted writes to finish.  Otherwise writes that have not started are
+                        dropped
+        """
+        if flush:
+            self.flush()
+        else:
+            self.dropped += len(self.tasks)
+            self.tasks.clear()
+        self.stopping = True
+        self.thread.join()
+
+    def __str__(self):
+        return ("Background writer: " + str(self.written) + " written, " + str(self.dropped) + " dropped, " +
+                str(self.blocked) + " blocked, " + str(self.failed) + " failed")
@@ -1,10 +1,27 @@
 import os
+import random
+from multiprocessing import Event, Process, Queue
+from Queue import Empty
 import signal
+import sys
 import time
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from BackgroundWriter import *
 from FileManager import *
+from GenerationLog import *
 from internal.ChromosomeType import *
+from internal.EvaluationPool import *
+from internal.FitnessCache import *
 from internal.GenerationType import *
+from internal.Migration import *
+from internal.Selection import *
+from internal.SteadyStatePopulation import *
+from internal.ThreadEvaluator import ThreadEvaluator
 
 
 class EvolutionManager(object):
@@ -25,8 +42,39 @@ class EvolutionManager(object):
                  generationsToKeep=0,
                  snapshotGenerations=None,
                  threads=1,
-                 startingGeneration=None):
+                 scheduling="static",
+                 chunkSize=1,
+                 startingGeneration=None,
+                 batchFitnessFunction=None,
+                 batchFormat="array",
+                 arrayPopulation=False,
+                 selection="proportional",
+                 tournamentSize=2,
+                 fitnessCacheSize=0,
+                 streamLog=False,
+                 binarySnapshots=False,
+                 checkpointFile=None,
+                 checkpointInterval=None,
+                 writerQueueSize=0,
+                 writerPolicy="block",
+                 flushOnExit=True,
+                 islands=1,
+                 migrationInterval=10,
+                 migrants=1,
+                 migrationTopology="ring",
+                 steadyState=False,
+                 concurrency=0,
+                 fitnessTimeout=None,
+                 timeoutFitness=0.0,
+                 sharedMemory=True):
         """
+        Runs draw random numbers from both random and numpy.random.  When a run starts numpy.random is seeded from
+        random, so calling random.seed before run is enough to make a run reproducible.  Seeding numpy.random yourself
+        has no effect
+
+        :param fitnessFunction: measures the fitness of a single chromosome.  May be None if a batchFitnessFunction
+                                    is given
+        :type fitnessFunction: (Chromosome) -> float
         :param individualsPerGeneration: the size of the new generation
         :type individualsPerGeneration: int
         :param elitism: preserve the n most fit individuals without mutations or crossovers
@@ -53,10 +101,101 @@ class EvolutionManager(object):
                                     then the 5 most recent generations will be saved
         :param snapshotGenerations: take a snapshot of the system very N trials
         :type snapshotGenerations: int
-        :param threads: the number of threads to use for fitness tests
+        :param threads: the number of threads to use for fitness tests.  If more than one, a pool of worker processes
+                            is started once and reused for every generation
         :type threads: int
-        :param startingGeneration: start with generation defined in YAML instead of a random generation
+        :param scheduling: how fitness tests are divided between threads.  "static" gives each thread an equal slice of
+                            the generation, "dynamic" hands out chunks of chunkSize chromosomes to whichever thread is
+                            idle.  Use "dynamic" when the cost of the fitness function varies between individuals
+        :type scheduling: str
+        :param chunkSize: the number of chromosomes in each unit of work when scheduling is "dynamic"
+        :type chunkSize: int
+        :param startingGeneration: start with generation defined in YAML or in a binary checkpoint instead of a random
+                                    generation
         :type startingGeneration: str
+        :param batchFitnessFunction: if provided, this function is used to measure the fitness of a whole generation
+                                        in one call instead of calling fitnessFunction for each chromosome.  It
+                                        receives the gene values of every individual and returns a sequence of
+                                        fitness values, one per individual.  None indicates a perfect match
+        :param batchFormat: the form of the gene values given to batchFitnessFunction.  "array" gives a 2-D numpy
+                                array of individuals x genes with the columns in the order genes were added by
+                                addGeneType, "dict" gives a dict mapping each gene description to a numpy array
+        :type batchFormat: str
+        :param arrayPopulation: store each generation as one numpy array per gene type instead of one object per
+                                    gene.  Every gene type must support this (FloatGeneType, IntGeneType and
+                                    BoolGeneType do) and numpy must be installed
+        :type arrayPopulation: bool
+        :param selection: how parents are chosen.  "proportional" selects in proportion to fitness, "tournament" picks
+                            the most fit of tournamentSize random individuals, "rank" selects in proportion to the
+                            rank of the fitness, "sus" is fitness proportional stochastic universal sampling.  A
+                            function (population, fitness) -> BreedingPool may be given to use a custom strategy
+        :param tournamentSize: the number of individuals competing in each tournament when selection is "tournament"
+        :type tournamentSize: int
+        :param fitnessCacheSize: if more than 0, remember the fitness of up to this many genomes so that chromosomes
+                                    with identical genes are not tested again.  The least recently used genomes are
+                                    forgotten first
+        :type fitnessCacheSize: int
+        :param streamLog: if True, kept and snapshot generations are appended to logDir/generations.jsonl as soon as
+                            they are produced instead of being held in memory and written as YAML by dataDump.  Every
+                            kept generation is written, read the log with GenerationLog.read
+        :type streamLog: bool
+        :param binarySnapshots: if True, dataDump writes generations as binary checkpoints (.ckpt) instead of YAML.
+                                    Every gene type must have a dtype
+        :type binarySnapshots: bool
+        :param checkpointFile: the file that the full state of the run is written to, see checkpointInterval and resume
+        :type checkpointFile: str
+        :param checkpointInterval: write the full state of the run (current generation, generation counter, elapsed time,
+                                    generations waiting to be written and random number generator state) to
+                                    checkpointFile every N generations.  The file is replaced atomically
+        :type checkpointInterval: int
+        :param writerQueueSize: if more than 0, log files, snapshots and checkpoints are written by a background thread.
+                                    The generation is copied and handed to the thread, which queues up to this many
+                                    writes
+        :type writerQueueSize: int
+        :param writerPolicy: what to do with a write when the background queue is full.  "block" waits for room,
+                                "drop" discards the write
+        :type writerPolicy: str
+        :param flushOnExit: if True, the run waits for queued background writes to finish when it ends (including when
+                                it is interrupted).  Otherwise writes that have not started are discarded
+        :type flushOnExit: bool
+        :param islands: if more than 1, run this many independent populations (islands) of individualsPerGeneration
+                            individuals, each in its own process, and return the most fit individual found by any of
+                            them.  Each island tests its fitness serially, threads is ignored.  Generations kept for
+                            the log directory are written to logDir/island<N>.  Every island runs maxGenerations
+                            generations, when one island stops for another reason the others stop too.  The random
+                            numbers of each island are seeded from random, so seeding random reproduces each island,
+                            although when migrants arrive depends on timing
+        :type islands: int
+        :param migrationInterval: the number of generations between migrations when islands is more than 1
+        :type migrationInterval: int
+        :param migrants: the number of most fit individuals that each island sends to each of its neighbours.  They
+                            replace the least fit individuals of the receiving island
+        :type migrants: int
+        :param migrationTopology: "ring" sends migrants to the next island only, "full" sends them to every other
+                                    island
+        :type migrationTopology: str
+        :param steadyState: if True, there is no barrier between generations.  A new child is bred from the current
+                                population as soon as a worker is free and replaces the least fit individual as soon
+                                as its fitness is known.  Every individualsPerGeneration fitness tests count as one
+                                generation for maxGenerations, snapshots and the kept generations.  randIndividuals
+                                and fitnessCacheSize are not used
+        :type steadyState: bool
+        :param concurrency: if more than 0, up to this many fitness tests run at once, each in its own thread of this
+                                process, instead of in worker processes.  Use this for fitness functions that spend
+                                most of their time waiting, for example on a network service.  threads is ignored
+        :type concurrency: int
+        :param fitnessTimeout: when fitness tests run in threads or worker processes, the number of seconds a single
+                                fitness test may take before it is abandoned.  A worker process that takes too long
+                                is killed and replaced, as is one that crashes.  None means no limit
+        :type fitnessTimeout: float
+        :param timeoutFitness: the fitness given to an individual whose fitness test was abandoned or crashed its
+                                worker process
+        :type timeoutFitness: float
+        :param sharedMemory: if True and threads is more than 1, the gene values of a generation are packed into shared
+                                memory read by the worker processes and fitness values are written back to it, only
+                                row numbers are sent to the workers.  Gene types without a numeric dtype, and
+                                generations larger than individualsPerGeneration, are sent through pipes instead
+        :type sharedMemory: bool
 
         """
         self.geneTypes = []
@@ -77,11 +216,55 @@ class EvolutionManager(object):
         self.generationsToKeep = generationsToKeep
         self.snapshotGenerations = snapshotGenerations
         self.threads = threads
+        self.scheduling = scheduling
+        self.chunkSize = chunkSize
         self.startingGenration = startingGeneration
+        self.batchFitnessFunction = batchFitnessFunction
+        self.batchFormat = batchFormat
+        self.arrayPopulation = arrayPopulation
+        self.selection = getSelection(selection, tournamentSize)
+        #steady state runs draw parents without building breeding pools, see SteadyStatePopulation
+        self.selectionStrategy = selection
+        self.tournamentSize = tournamentSize
+        self.fitnessCache = None
+        if fitnessCacheSize > 0:
+            self.fitnessCache = FitnessCache(fitnessCacheSize)
 
         self.FM = FileManager()
         self.oldGenerations = []
         self.oldGenerations_perm = []
+        self.evaluationPool = None
+        self.streamLog = streamLog
+        self.binarySnapshots = binarySnapshots
+        self.writerQueueSize = writerQueueSize
+        self.writerPolicy = writerPolicy
+        self.flushOnExit = flushOnExit
+        self.writer = None
+        self.checkpointFile = checkpointFile
+        self.checkpointInterval = checkpointInterval
+        if checkpointInterval is not None and checkpointFile is None:
+            raise Exception("A checkpointFile is required when checkpointInterval is set")
+        self.generationLog = None
+        self.islands = islands
+        self.migrationInterval = migrationInterval
+        self.migrants = migrants
+        self.migrationTopology = migrationTopology
+        self.migration = None
+        #why the last call to evolve returned: "maxGenerations", "fitness", "time", "migration" or "perfectMatch".  None
+        #while it runs or if it raised an exception
+        self.stopReason = None
+        self.steadyState = steadyState
+        self.concurrency = concurrency
+        self.fitnessTimeout = fitnessTimeout
+        self.timeoutFitness = timeoutFitness
+        self.sharedMemory = sharedMemory
+        if steadyState and (islands > 1 or checkpointInterval is not None):
+            raise Exception("Steady state runs do not support islands or checkpoints")
+        if islands > 1:
+            if migrationTopology not in MIGRATION_TOPOLOGIES:
+                raise Exception("Unknown migration topology: " + str(migrationTopology))
+            if checkpointInterval is not None:
+                raise Exception("Checkpoints are not supported with more than one island")
 
         def signal_handler(signal, frame):
             print "dumping data"
@@ -104,9 +287,19 @@ class EvolutionManager(object):
         Return a chromosome of the appropriate type.  Useful for creating specific chromosomes to be added
         :rtype: Chromosome
         """
+        return self.getChromosomeType().getRandomChromosome()
+
+    def getChromosomeType(self):
+        """
+        Finalize the chromosome template.  No gene types can be added afterwards
+        :rtype: ChromosomeType
+        """
         if self.chromosomeType is None:
-            self.chromosomeType = ChromosomeType(self.fitnessFunction, self.geneTypes)
-        return self.chromosomeType.getRandomChromosome()
+            self.chromosomeType = ChromosomeType(self.fitnessFunction,
+                                                 self.geneTypes,
+                                                 batchFitnessFunction=self.batchFitnessFunction,
+                                                 batchFormat=self.batchFormat)
+        return self.chromosomeType
 
     def addChromosome(self, chromsome):
         """
@@ -115,60 +308,261 @@ class EvolutionManager(object):
         """
         self.startingChromosomes.append(chromsome)
 
-    def run(self):
+    def checkGeneTypes(self):
+        """
+        Raise an exception if the gene types cannot be used with the settings of this manager.  Called before a run
+        starts, rather than when the kept generations are written at its end
+        """
+        if self.binarySnapshots:
+            checkCheckpointTypes(self.geneTypes)
 
-        if self.chromosomeType is None:
-            self.chromosomeType = ChromosomeType(self.fitnessFunction, self.geneTypes)
+    def prepare(self):
+        """
+        Finalize the chromosome template and start the resources used by a run
+        :rtype: GenerationType
+        """
+        self.getChromosomeType()
+        self.checkGeneTypes()
+
+        #selection and mutation also draw from numpy.random, seeding it from random makes a run that seeds random
+        #reproducible
+        if numpy is not None:
+            numpy.random.seed(random.getrandbits(32))
+
+        #a batch fitness function tests the whole generation in this process, worker processes are not needed
+        if self.batchFitnessFunction is None and self.evaluationPool is None:
+            if self.concurrency > 0:
+                self.evaluationPool = ThreadEvaluator(self.chromosomeType,
+                                                      self.concurrency,
+                                                      timeout=self.fitnessTimeout,
+                                                      timeoutFitness=self.timeoutFitness)
+            elif self.threads > 1:
+                sharedCapacity = 0
+                if self.sharedMemory:
+                    sharedCapacity = max(self.individualsPerGeneration, len(self.startingChromosomes))
+                self.evaluationPool = EvaluationPool(self.chromosomeType,
+                                                     self.threads,
+                                                     scheduling=self.scheduling,
+                                                     chunkSize=self.chunkSize,
+                                                     sharedCapacity=sharedCapacity,
+                                                     timeout=self.fitnessTimeout,
+                                                     failureFitness=self.timeoutFitness)
+
+        if self.writerQueueSize > 0 and self.writer is None:
+            self.writer = BackgroundWriter(self.writerQueueSize, self.writerPolicy)
+            self.FM.writer = self.writer
+
+        if self.streamLog and self.logDir is not None and self.generationLog is None:
+            if not os.path.exists(self.logDir):
+                os.mkdir(self.logDir)
+            self.generationLog = GenerationLog(os.path.join(self.logDir, "generations.jsonl"), writer=self.writer)
+
+        return GenerationType(self.chromosomeType, arrayPopulation=self.arrayPopulation)
+
+    def run(self):
 
-        generationType = GenerationType(self.chromosomeType)
+        if self.islands > 1:
+            return self.runIslands()
 
+        #the worker processes and the background writer are stopped even if the run ends with an exception, for
+        #example a perfect match in the starting generation
+        try:
+            generationType = self.prepare()
+            if self.steadyState:
+                return self.evolveSteadyState(self.getStartingGeneration(generationType))
+            return self.evolve(self.getStartingGeneration(generationType), 0, 0.0)
+        finally:
+            self.stopResources()
+
+    def getStartingGeneration(self, generationType):
+        """
+        Create the first generation of a run and measure its fitness
+        :type generationType: GenerationType
+        """
         if self.startingGenration is None:
             currentGeneration = generationType.getRandomGeneration(max(0, self.individualsPerGeneration-len(self.startingChromosomes)))
+        elif self.FM.isCheckpoint(self.startingGenration):
+            currentGeneration = generationType.fromCheckpoint(self.startingGenration)
         else:
             fobj = open(self.startingGenration)
-            flist = []
-            for line in fobj:
-                flist.append(line)
-            fline = "".join(flist)
-            currentGeneration = generationType.fromYAML(fline)
+            currentGeneration = generationType.fromYAML(fobj.read())
             fobj.close()
 
-        currentGeneration.population += self.startingChromosomes
-        currentGeneration.doFitnessTests(threads=self.threads)
+        currentGeneration.addChromosomes(self.startingChromosomes)
+        currentGeneration.doFitnessTests(threads=self.threads, pool=self.evaluationPool, cache=self.fitnessCache)
 
         print "The most fit individual in the starting generation is\n"
         print currentGeneration.getMostFit()
 
-        startTime = None
-        if self.stopAfterTime is not None:
-            startTime = time.time()
+        return currentGeneration
+
+    def runIslands(self):
+        """
+        Run one population per island, each in its own process.  Returns the most fit individual found by any island
+        :rtype: Chromosome
+        """
+        chromosomeType = self.getChromosomeType()
+        self.checkGeneTypes()
+        if self.logDir is not None and not os.path.exists(self.logDir):
+            os.mkdir(self.logDir)
+        inboxes = [Queue() for island in xrange(self.islands)]
+        stopEvent = Event()
+        results = Queue()
+
+        #every island explores a different part of the search space, but a run that seeds random is reproducible
+        baseSeed = random.getrandbits(32)
+        processes = []
+        for island in xrange(self.islands):
+            migration = Migration(island, inboxes, stopEvent, topology=self.migrationTopology,
+                                  interval=self.migrationInterval, migrants=self.migrants)
+            p = Process(target=self.runIsland, args=(migration, results, baseSeed + island))
+            p.start()
+            processes.append(p)
+
+        #(island, values, fitness, perfectMatch) for each island
+        found = []
+        while len(found) < self.islands:
+            try:
+                found.append(results.get(timeout=1))
+            except Empty:
+                if not any(p.is_alive() for p in processes) and results.empty():
+                    raise Exception("An island stopped without reporting a result")
+        for p in processes:
+            p.join()
+
+        best = None
+        for island, values, fitness, perfectMatch in found:
+            if values is None:
+                continue
+            if best is None or perfectMatch or (not best[3] and fitness > best[2]):
+                best = (island, values, fitness, perfectMatch)
+            if perfectMatch:
+                break
+        if best is None:
+            return None
+
+        print "The most fit individual was found on island " + str(best[0])
+        chromosome = chromosomeType.fromValues(best[1])
+        chromosome.fitness = best[2]
+        chromosome.perfectMatch = best[3]
+        chromosome.dirty = False
+        return chromosome
+
+    def runIsland(self, migration, results, seed):
+        """
+        The main function of an island process
+        :type migration: Migration
+        :param results: the island places (island, values, fitness, perfectMatch) here when it finishes
+        :type results: multiprocessing.Queue
+        :param seed: the seed of the random number generators of this island, numpy.random is seeded from random by
+                        prepare
+        :type seed: int
+        """
+        random.seed(seed)
+
+        migration.detach()
+        self.migration = migration
+        self.threads = 1
+        if self.logDir is not None:
+            self.logDir = os.path.join(self.logDir, "island" + str(migration.island))
+
+        try:
+            generationType = self.prepare()
+            best = self.evolve(self.getStartingGeneration(generationType), 0, 0.0)
+        except Chromosome.PerfectMatch as e:
+            self.stopReason = "perfectMatch"
+            self.dataDump()
+            best = e.message
+        finally:
+            self.stopResources()
+            #every island runs the same number of generations, the others are only stopped early for other reasons
+            if self.stopReason != "maxGenerations":
+                migration.stop()
+
+        print migration
+        if best is None:
+            results.put((migration.island, None, None, False))
+        else:
+            results.put((migration.island, best.getValues(), best.fitness, best.perfectMatch))
+
+    def resume(self, source):
+        """
+        Continue a run from a checkpoint written because of checkpointInterval.  The gene types and the fitness function
+        must be added exactly as they were for the original run, they are not stored in the checkpoint
+        :param source: the checkpoint file
+        :type source: str
+        """
+        state = self.FM.readState(source)
+        try:
+            generationType = self.prepare()
+
+            currentGeneration = generationType.fromData(state["generation"])
+            self.oldGenerations = [(trial, generationType.fromData(data)) for trial, data in state["oldGenerations"]]
+            self.oldGenerations_perm = [(trial, generationType.fromData(data))
+                                        for trial, data in state["oldGenerations_perm"]]
+            random.setstate(state["randomState"])
+            if numpy is not None and state["numpyRandomState"] is not None:
+                numpy.random.set_state(state["numpyRandomState"])
+
+            print "Resuming after generation " + str(state["trials"])
+            return self.evolve(currentGeneration, state["trials"], state["elapsedTime"])
+        finally:
+            self.stopResources()
+
+    def checkpoint(self, trials, currentGeneration, elapsedTime):
+        """
+        Write the full state of the run to checkpointFile
+        :param trials: the number of generations that have been completed
+        :param elapsedTime: the number of seconds the run has taken so far
+        """
+        numpyRandomState = None
+        if numpy is not None:
+            numpyRandomState = numpy.random.get_state()
+        state = {"trials": trials,
+                 "elapsedTime": elapsedTime,
+                 "generation": currentGeneration.data(),
+                 "oldGenerations": [(trial, generation.data()) for trial, generation in self.oldGenerations],
+                 "oldGenerations_perm": [(trial, generation.data()) for trial, generation in self.oldGenerations_perm],
+                 "randomState": random.getstate(),
+                 "numpyRandomState": numpyRandomState}
+        self.FM.writeState(state, self.checkpointFile)
+
+    def evolve(self, currentGeneration, trials, elapsedTime):
+        """
+        The main loop of a run
+        :param currentGeneration: a generation whose fitness has been measured
+        :param trials: the number of generations that have already been completed
+        :param elapsedTime: the number of seconds that have already been spent on this run
+        """
+        startTime = time.time() - elapsedTime
+        self.stopReason = None
 
         try:
 
-            trials = 0
             while True:
                 trials += 1
-
-                #take a snapshot
-                if self.snapshotGenerations is not None and trials % self.snapshotGenerations == 0:
-                    self.oldGenerations_perm.append((trials, currentGeneration))
-                #save this trial in temporary storage
-                elif self.generationsToKeep > 0:
-                    if len(self.oldGenerations) >= self.generationsToKeep:
-                        self.oldGenerations = self.oldGenerations[1:]
-                    self.oldGenerations.append((trials, currentGeneration))
+                self.keepTrial(trials, currentGeneration)
 
                 #exit conditions
                 if self.maxGenerations is not None and trials > self.maxGenerations:
                     print "Maximum number of generations reached"
+                    self.stopReason = "maxGenerations"
                     self.dataDump()
                     return currentGeneration.getMostFit()
-                if self.stopWithFitness is not None and currentGeneration.getMostFit().fitness >= self.stopWithFitness:
+                statistics = currentGeneration.getStatistics()
+                if self.stopWithFitness is not None and statistics["max"] >= self.stopWithFitness:
                     print "Sufficient fitness achieved"
+                    self.stopReason = "fitness"
                     self.dataDump()
                     return currentGeneration.getMostFit()
                 if self.stopAfterTime is not None and (time.time() - startTime) >= self.stopAfterTime:
                     print "Time limit reached"
+                    self.stopReason = "time"
+                    self.dataDump()
+                    return currentGeneration.getMostFit()
+                if self.migration is not None and self.migration.stopped():
+                    print "Another island has finished"
+                    self.stopReason = "migration"
                     self.dataDump()
                     return currentGeneration.getMostFit()
 
@@ -180,37 +574,192 @@ class EvolutionManager(object):
                                                                      self.randIndividuals,
                                                                      self.randFitness,
                                                                      self.mutationRate,
-                                                                     self.mutationSTDEV)
+                                                                     self.mutationSTDEV,
+                                                                     selection=self.selection)
 
 
-                nextGeneration.doFitnessTests(threads=self.threads)
+                nextGeneration.doFitnessTests(threads=self.threads, pool=self.evaluationPool, cache=self.fitnessCache)
 
 
+                statistics = nextGeneration.getStatistics()
                 print "The most fit individual in this generation is\n"
-                print nextGeneration.getMostFit()
+                print statistics["mostFit"]
+                print "Fitness: max " + str(statistics["max"]) + ", mean " + str(statistics["mean"]) + ", min " + \
+                      str(statistics["min"])
+                if self.fitnessCache is not None:
+                    print self.fitnessCache
 
                 currentGeneration = nextGeneration
 
+                if self.migration is not None and trials % self.migration.interval == 0:
+                    self.migration.migrate(currentGeneration)
+
+                if self.checkpointInterval is not None and trials % self.checkpointInterval == 0:
+                    self.checkpoint(trials, currentGeneration, time.time() - startTime)
+
         except Chromosome.PerfectMatch as e:
                 print "A perfect match has been found"
                 print e.message
+                self.stopReason = "perfectMatch"
 
                 if self.generationsToKeep > 0:
-                    if len(self.oldGenerations) >= self.generationsToKeep:
-                        self.oldGenerations = self.oldGenerations[1:]
-                    self.oldGenerations.append((trials, currentGeneration))
+                    self.recordGeneration(trials, currentGeneration)
                 self.dataDump()
                 return e.message
 
+    def evolveSteadyState(self, currentGeneration):
+        """
+        The main loop of a steady state run, see steadyState
+        :param currentGeneration: a generation whose fitness has been measured
+        """
+        startTime = time.time()
+        generationType = currentGeneration.generationType
+        population = SteadyStatePopulation([chromosome.copy() for chromosome in currentGeneration.population],
+                                           self.selectionStrategy, self.tournamentSize)
+        size = len(population)
+        workers = 1
+        if self.evaluationPool is not None:
+            workers = self.evaluationPool.processes
+        evaluations = 0
+        trials = 0
+        running = 0
+
+        try:
+
+            while True:
+                #every individualsPerGeneration fitness tests make up one generation
+                if evaluations >= trials * size:
+                    trials += 1
+                    self.keepTrial(trials, generationType.makeGeneration(list(population.population)))
+                    if trials > 1:
+                        print "-" * 100
+                        print "The most fit individual after " + str(evaluations) + " fitness tests is\n"
+                        print population.getMostFit()
+
+                #exit conditions
+                if self.maxGenerations is not None and evaluations >= self.maxGenerations * size:
+                    print "Maximum number of generations reached"
+                    self.dataDump()
+                    return population.getMostFit()
+                if self.stopWithFitness is not None and population.getMostFit().fitness >= self.stopWithFitness:
+                    print "Sufficient fitness achieved"
+                    self.dataDump()
+                    return population.getMostFit()
+                if self.stopAfterTime is not None and (time.time() - startTime) >= self.stopAfterTime:
+                    print "Time limit reached"
+                    self.dataDump()
+                    return population.getMostFit()
+
+                if self.evaluationPool is None:
+                    child = self.breedChild(population)
+                    child.doFitnessTest()
+                else:
+                    #keep every worker busy
+                    while running < workers:
+                        self.evaluationPool.submit(self.breedChild(population))
+                        running += 1
+                    child = self.evaluationPool.collect()
+                    if child is None:
+                        continue
+                    running -= 1
+
+                evaluations += 1
+                population.replaceWeakest(child, self.elitism)
+
+        except Chromosome.PerfectMatch as e:
+                print "A perfect match has been found"
+                print e.message
+
+                if self.generationsToKeep > 0:
+                    self.recordGeneration(trials, generationType.makeGeneration(list(population.population)))
+                self.dataDump()
+                return e.message
+
+    def breedChild(self, population):
+        """
+        Breed a single mutated child from two parents chosen from the population, used by steady state runs
+        :type population: SteadyStatePopulation
+        :rtype: Chromosome
+        """
+        mother, father = population.getParents()
+        child = mother + father
+        child.mutate(self.mutationRate, self.mutationSTDEV)
+        return child
+
+    def keepTrial(self, trials, generation):
+        """
+        Take a snapshot of a generation or keep it as one of the most recent generations, as configured
+        """
+        #take a snapshot
+        if self.snapshotGenerations is not None and trials % self.snapshotGenerations == 0:
+            self.recordGeneration(trials, generation, snapshot=True)
+        #save this trial in temporary storage
+        elif self.generationsToKeep > 0:
+            self.recordGeneration(trials, generation)
+
+    def recordGeneration(self, trial, generation, snapshot=False):
+        """
+        Keep a generation so that it is written to the log directory.  With a streaming log the generation is written
+        immediately, otherwise it is held in memory until dataDump is called
+        :param trial: the number of the generation
+        :param snapshot: True for a periodic snapshot, False for one of the most recent generations
+        """
+        if self.generationLog is not None:
+            if snapshot:
+                self.generationLog.append(trial, generation, "snapshot")
+            else:
+                self.generationLog.append(trial, generation, "keep")
+        elif snapshot:
+            self.oldGenerations_perm.append((trial, generation))
+        else:
+            if len(self.oldGenerations) >= self.generationsToKeep:
+                self.oldGenerations = self.oldGenerations[1:]
+            self.oldGenerations.append((trial, generation))
+
     def dataDump(self):
         """
         Call this function to write all of the pending generations to disk
         """
 
-        if self.logDir is not None:
-            if not os.path.exists(self.logDir):
-                os.mkdir(self.logDir)
-            for trial in self.oldGenerations:
-                self.FM.write(trial[1], self.logDir + "/" + str(trial[0]) + ".yaml")
-            for trial in self.oldGenerations_perm:
-                self.FM.write(trial[1], self.logDir + "/" + str(trial[0]) + ".yaml")
\ No newline at end of file
+        try:
+            if self.logDir is not None:
+                if not os.path.exists(self.logDir):
+                    os.mkdir(self.logDir)
+                for trial in self.oldGenerations + self.oldGenerations_perm:
+                    if self.binarySnapshots:
+                        self.FM.writeCheckpoint(trial[1], self.logDir + "/" + str(trial[0]) + ".ckpt")
+                    else:
+                        self.FM.write(trial[1], self.logDir + "/" + str(trial[0]) + ".yaml")
+        finally:
+            self.stopResources()
+
+    def stopResources(self):
+        """
+        Stop the background writer, close the generation log and stop the worker processes.  Safe to call more than once
+        """
+        try:
+            self.stopWriter()
+            if self.generationLog is not None:
+                self.generationLog.close()
+                self.generationLog = None
+        finally:
+            self.stopEvaluationPool()
+
+    def stopWriter(self):
+        """
+        Stop the background writer, if one is running.  Queued writes are finished first if flushOnExit is True
+        """
+        if self.writer is not None:
+            self.writer.close(flush=self.flushOnExit)
+            print self.writer
+            self.writer = None
+            self.FM.writer = None
+
+    def stopEvaluationPool(self):
+        """
+        Shut down the worker processes used for fitness tests, if any are running
+        """
+        if self.evaluationPool is not None:
+            self.evaluationPool.shutdown()
+            print self.evaluationPool
+            self.evaluationPool = None
\ No newline at end of file
@@ -1,24 +1,90 @@
+import cPickle
+import os
+
 import yaml
 
+from internal.Checkpoint import *
+
 
 class FileManager():
     """
     Use this class to read and write to disk
     """
 
-    def __init__(self):
-        pass
+    def __init__(self, writer=None):
+        """
+        :param writer: if provided, files are written on this background writer.  The data to be written is copied
+                        before write returns
+        :type writer: BackgroundWriter
+        """
+        self.writer = writer
+
+    def submit(self, function, *args):
+        if self.writer is not None:
+            self.writer.submit(function, *args)
+        else:
+            function(*args)
 
     def write(self, data, target):
         """
         Can write anything to file that has a .data() method returning a YAML friendly object
         :param target: the file where this object should be written
         """
+        self.submit(self.writeYAML, data.data(), target)
+
+    def writeYAML(self, snapshot, target):
         fobj = open(target, "w")
-        fobj.write(self.freezeDry(data))
+        fobj.write(yaml.dump(snapshot, default_flow_style=False))
         fobj.close()
 
 
     def freezeDry(self, data):
         return yaml.dump(data.data(), default_flow_style=False)
 
+    def writeCheckpoint(self, generation, target):
+        """
+        Write a generation to a compact binary checkpoint (typed gene columns, a fitness column and a header
+        describing the gene types).  Checkpoints are opened with GenerationType.fromCheckpoint
+        :param target: the file where the generation should be written
+        """
+        if isinstance(generation, ArrayGeneration):
+            snapshot = ArrayGeneration(generation.generationType,
+                                       [column.copy() for column in generation.columns],
+                                       generation.fitness.copy())
+        else:
+            snapshot = ArrayGeneration.fromChromosomes(generation.generationType, generation.population)
+        self.submit(writeCheckpoint, snapshot, target)
+
+    def isCheckpoint(self, source):
+        """
+        Return True if the file is a binary checkpoint rather than YAML
+        """
+        return isCheckpoint(source)
+
+    def writeState(self, state, target):
+        """
+        Pickle an object to a file atomically.  The object is written to a temporary file which then replaces the target,
+        so the target is never left partially written.  The object must not be changed after it is given to this method
+        """
+        self.submit(self.writeStateFile, state, target)
+
+    def writeStateFile(self, state, target):
+        temporary = target + ".tmp"
+        fobj = open(temporary, "wb")
+        try:
+            cPickle.dump(state, fobj, 2)
+            fobj.flush()
+            os.fsync(fobj.fileno())
+        finally:
+            fobj.close()
+        os.rename(temporary, target)
+
+    def readState(self, source):
+        """
+        Read an object written by writeState
+        """
+        fobj = open(source, "rb")
+        try:
+            return cPickle.load(fobj)
+        finally:
+            fobj.close()
@@ -1,7 +1,14 @@
 import random
 import sys
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from internal.BitVector import *
 from internal.GeneType import *
+from internal.Permutation import *
 
 
 def FloatGeneType(description,
@@ -62,7 +69,21 @@ def FloatGeneType(description,
         result = max(min(result, maxVal), minVal)
         return result
 
-    return GeneType(generator, mutator, description)
+    def columnGenerator(size):
+        if generatorAverage is None:
+            return numpy.random.uniform(minVal, maxVal, size)
+        else:
+            return numpy.clip(numpy.random.normal(generatorAverage, generatorSTDEV, size), minVal, maxVal)
+
+    def columnMutator(values, columns):
+        stdev = mutationSTDEV
+        if mutatorGene is not None:
+            stdev = numpy.abs(columns[mutatorGene])
+        result = values + averageMutation + stdev * numpy.random.standard_normal(len(values))
+        return numpy.clip(result, minVal, maxVal)
+
+    return GeneType(generator, mutator, description,
+                    dtype="float64", columnGenerator=columnGenerator, columnMutator=columnMutator, immutable=True)
 
 ##################################################################################################
 
@@ -124,7 +145,22 @@ def IntGeneType(description,
         result = max(min(result, maxVal), minVal)
         return int(round(result))
 
-    return GeneType(generator, mutator, description)
+    def columnGenerator(size):
+        if generatorAverage is None:
+            result = numpy.random.uniform(minVal, maxVal, size)
+        else:
+            result = numpy.clip(numpy.random.normal(generatorAverage, generatorSTDEV, size), minVal, maxVal)
+        return numpy.rint(result).astype("int64")
+
+    def columnMutator(values, columns):
+        stdev = mutationSTDEV
+        if mutatorGene is not None:
+            stdev = numpy.abs(columns[mutatorGene])
+        result = values + averageMutation + stdev * numpy.random.standard_normal(len(values))
+        return numpy.rint(numpy.clip(result, minVal, maxVal)).astype("int64")
+
+    return GeneType(generator, mutator, description,
+                    dtype="int64", columnGenerator=columnGenerator, columnMutator=columnMutator, immutable=True)
 
 ##################################################################################################
 
@@ -151,7 +187,112 @@ def BoolGeneType(description,
         else:
             return originalValue
 
-    return GeneType(generator, mutator, description)
+    def columnGenerator(size):
+        return numpy.random.uniform(0.0, 1.0, size) < probabilityTrue
+
+    def columnMutator(values, columns):
+        return values ^ (numpy.random.uniform(0.0, 1.0, len(values)) <= mutationProbability)
+
+    return GeneType(generator, mutator, description,
+                    dtype="bool", columnGenerator=columnGenerator, columnMutator=columnMutator, immutable=True)
+
+##################################################################################################
+
+def BitVectorGeneType(description,
+                      length,
+                      probabilityTrue=0.5,
+                      flipProbability=None):
+    """
+    Return a GeneType holding a whole string of bits as one BitVector value.  Much more compact, and much faster to
+    mutate and cross over, than one BoolGeneType per bit for chromosomes of thousands of bits.  Fitness functions
+    read bit i with chromosome[description][i]
+    :param description: the description/name of the gene
+    :type description: str
+    :param length: the number of bits
+    :type length: int
+    :param probabilityTrue: The probability that each bit of a randomly generated gene is true
+    :type probabilityTrue: float
+    :param flipProbability: The probability that each bit flips when the gene is mutated.  None means 1.0 / length,
+                            so one bit flips per mutation on average
+    :type flipProbability: float
+    :rtype: GeneType
+    """
+    if length < 1:
+        raise Exception("A bit vector needs at least one bit")
+    if flipProbability is None:
+        flipProbability = 1.0 / length
+
+    def generator():
+        return BitVector(randomBits(length, probabilityTrue), length)
+
+    def mutator(originalValue, chromosome):
+        return originalValue.flip(randomBits(length, flipProbability))
+
+    def combiner(geneA, geneB):
+        #uniform crossover, each bit comes from either parent with equal probability
+        return Gene(geneA.geneType, geneA.value.blend(geneB.value, random.getrandbits(length)))
+
+    def encoder(value):
+        return value.hex()
+
+    def decoder(data):
+        return BitVector.fromHex(data, length)
+
+    return GeneType(generator, mutator, description, combiner=combiner, encoder=encoder, decoder=decoder,
+                    immutable=True)
+
+##################################################################################################
+
+def PermutationGeneType(description,
+                        length,
+                        mutation="swap",
+                        crossover="order"):
+    """
+    Return a GeneType whose value is an ordering of the integers 0 to length - 1, stored in an array.array.  Suits
+    ordering problems such as scheduling and routing, the fitness function maps each integer to the item it stands for.
+    Crossover always produces a valid permutation
+    :param description: the description/name of the gene
+    :type description: str
+    :param length: the number of items being ordered
+    :type length: int
+    :param mutation: how the order changes each time the gene is mutated.  "swap" exchanges two items, "inversion"
+                        reverses a random slice and "scramble" shuffles a random slice
+    :type mutation: str
+    :param crossover: "order" for order crossover (OX), "pmx" for partially mapped crossover
+    :type crossover: str
+    :rtype: GeneType
+    """
+    if length < 2:
+        raise Exception("A permutation needs at least two items")
+    if mutation not in PERMUTATION_MUTATIONS:
+        raise Exception("Unknown permutation mutation: " + str(mutation))
+    if crossover not in PERMUTATION_CROSSOVERS:
+        raise Exception("Unknown permutation crossover: " + str(crossover))
+    mutate = {"swap": swapMutation, "inversion": inversionMutation, "scramble": scrambleMutation}[mutation]
+    cross = {"order": orderCrossover, "pmx": pmxCrossover}[crossover]
+
+    def generator():
+        return randomPermutation(length)
+
+    def mutator(originalValue, chromosome):
+        return mutate(originalValue)
+
+    def combiner(geneA, geneB):
+        return Gene(geneA.geneType, cross(geneA.value, geneB.value))
+
+    def encoder(value):
+        return value.tolist()
+
+    def decoder(data):
+        if len(data) != length or not isPermutation(data):
+            raise Exception("Not a permutation of " + str(length) + " items: " + str(data))
+        return array(PERMUTATION_TYPECODE, data)
+
+    def copier(value):
+        return value[:]
+
+    return GeneType(generator, mutator, description, combiner=combiner, encoder=encoder, decoder=decoder,
+                    copier=copier)
 
 ##################################################################################################
 
@@ -176,4 +317,4 @@ def FloatInverseFit(description, maxVal=1, startVal=1):
                 return val
         return originalValue
 
-    return GeneType(generator, mutator, description)
\ No newline at end of file
+    return GeneType(generator, mutator, description, immutable=True)
\ No newline at end of file
@@ -0,0 +1,75 @@
+import json
+
+
+class GenerationLog(object):
+    """
+    An append-only log of generations, stored as one JSON record per line.
+
+    Each generation is written as soon as it is recorded instead of being held in memory until the end of the run, so
+    memory use does not grow with the number of generations and the log survives if the process is killed
+    """
+
+    def __init__(self, target, writer=None):
+        """
+        :param target: the file that generations are appended to
+        :type target: str
+        :param writer: if provided, records are encoded and written on this background writer
+        :type writer: BackgroundWriter
+        """
+        self.target = target
+        self.writer = writer
+        self.fobj = None
+
+    def append(self, trial, generation, kind="keep"):
+        """
+        Write a generation to the end of the log
+        :param trial: the number of the generation
+        :type trial: int
+        :param kind: "keep" for one of the most recent generations, "snapshot" for a periodic snapshot
+        :type kind: str
+        """
+        record = {"trial": trial, "kind": kind, "generation": generation.data()}
+        if self.writer is not None:
+            self.writer.submit(self.writeRecord, record)
+        else:
+            self.writeRecord(record)
+
+    def writeRecord(self, record):
+        if self.fobj is None:
+            self.fobj = open(self.target, "a")
+        self.fobj.write(json.dumps(record) + "\n")
+        self.fobj.flush()
+
+    def close(self):
+        if self.fobj is not None:
+            self.fobj.close()
+            self.fobj = None
+
+    @staticmethod
+    def read(source, generationType=None):
+        """
+        Lazily iterate over the records of a log, one generation is in memory at a time
+        :param source: the log file
+        :type source: str
+        :param generationType: if provided, each generation is converted into a Generation of this type
+        :type generationType: GenerationType
+        :return: an iterator of (trial, kind, generation) tuples.  generation is the data written by Generation.data
+                    unless generationType is provided
+        """
+        fobj = open(source)
+        try:
+            for line in fobj:
+                line = line.strip()
+                if len(line) == 0:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    #the last record is incomplete if the process was killed while writing it
+                    break
+                generation = record["generation"]
+                if generationType is not None:
+                    generation = generationType.fromData(generation)
+                yield record["trial"], record["kind"], generation
+        finally:
+            fobj.close()
@@ -0,0 +1,87 @@
+import gc
+import os
+import sys
+
+from pyvolution.EvolutionManager import *
+from pyvolution.GeneLibrary import *
+
+
+"""
+This example measures how much memory each individual of a population uses.
+
+Usage: python MemoryBenchmark.py [individuals] [genes]
+
+It builds a population of random chromosomes with float, int and bool genes, then a copy of it, as EvolutionManager
+does for the generations it keeps in its history.  Two numbers are reported:
+    objects  the size of every object that belongs to the population, counted once, per individual
+    RSS      the growth of the resident set size of this process, per individual (Linux only)
+"""
+
+
+def residentBytes():
+    """
+    Return the resident set size of this process, or None where /proc is not available
+    """
+    try:
+        with open("/proc/self/statm") as fobj:
+            return int(fobj.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def objectBytes(roots, shared):
+    """
+    Return the total size of the objects reachable from roots, each counted once.  The objects in shared, everything
+    they refer to, and classes are not counted
+    """
+    excluded = set(id(obj) for obj in shared)
+    seen = set()
+    total = 0
+    stack = list(roots)
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or id(obj) in excluded or isinstance(obj, type):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        stack.extend(gc.get_referents(obj))
+    return total
+
+
+def fitnessFunction(chromosome):
+    return 1.0
+
+
+individuals = 20000
+genes = 30
+if len(sys.argv) > 1:
+    individuals = int(sys.argv[1])
+if len(sys.argv) > 2:
+    genes = int(sys.argv[2])
+
+geneTypes = []
+for index in xrange(genes):
+    if index % 3 == 0:
+        geneTypes.append(FloatGeneType("float" + str(index), generatorAverage=0))
+    elif index % 3 == 1:
+        geneTypes.append(IntGeneType("int" + str(index), minVal=0, maxVal=100))
+    else:
+        geneTypes.append(BoolGeneType("bool" + str(index)))
+chromosomeType = ChromosomeType(fitnessFunction, geneTypes)
+
+gc.collect()
+before = residentBytes()
+population = [chromosomeType.getRandomChromosome() for index in xrange(individuals)]
+gc.collect()
+afterPopulation = residentBytes()
+history = [chromosome.copy() for chromosome in population]
+gc.collect()
+afterHistory = residentBytes()
+
+print str(individuals) + " individuals, " + str(genes) + " genes each"
+print "objects: " + str(objectBytes(population, [chromosomeType] + geneTypes) / individuals) + " bytes per individual"
+print "objects, with a copy in the history: " + \
+      str(objectBytes(population + history, [chromosomeType] + geneTypes) / individuals) + " bytes per individual"
+if before is not None:
+    print "RSS: " + str((afterPopulation - before) / individuals) + " bytes per individual"
+    print "RSS, with a copy in the history: " + str((afterHistory - before) / individuals) + " bytes per individual"
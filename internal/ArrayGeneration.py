@@ -0,0 +1,353 @@
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from Chromosome import *
+from ColumnMutation import *
+from EvaluationPool import *
+from Gene import *
+from Selection import *
+
+
+class ArrayChromosome(Chromosome):
+    """
+    A lightweight view of a single individual in an ArrayGeneration.  Gene values and fitness are read from and written
+    to the columns of the generation
+    """
+
+    __slots__ = ("generation", "index")
+
+    def __init__(self, generation, index):
+        self.chromosomeType = generation.generationType.chromosomeType
+        self.generation = generation
+        self.index = index
+        self.perfectMatch = False
+
+    @property
+    def fitness(self):
+        if self.perfectMatch:
+            return None
+        fitness = self.generation.fitness[self.index]
+        if numpy.isnan(fitness):
+            return None
+        return float(fitness)
+
+    @fitness.setter
+    def fitness(self, value):
+        if value is None:
+            self.generation.fitness[self.index] = numpy.nan
+        else:
+            self.generation.fitness[self.index] = value
+
+    @property
+    def dirty(self):
+        return not self.perfectMatch and numpy.isnan(self.generation.fitness[self.index])
+
+    @dirty.setter
+    def dirty(self, value):
+        if value:
+            self.generation.fitness[self.index] = numpy.nan
+
+    @property
+    def genes(self):
+        """
+        Copies of the genes of this individual.  Changing them does not change the generation
+        :rtype: [Gene]
+        """
+        return [Gene(gType, value) for gType, value in zip(self.chromosomeType.geneTypes, self.getValues())]
+
+    def getValues(self):
+        return [column.item(self.index) for column in self.generation.columns]
+
+    def copy(self):
+        """
+        Create a stand alone copy of this individual
+        :rtype: Chromosome
+        """
+        chromosome = self.chromosomeType.fromValues(self.getValues())
+        chromosome.fitness = self.fitness
+        chromosome.perfectMatch = self.perfectMatch
+        chromosome.dirty = self.dirty
+        return chromosome
+
+    def __reduce__(self):
+        #a view cannot exist without its generation, it is pickled as a stand alone copy
+        chromosome = self.copy()
+        return Chromosome, (chromosome.chromosomeType, None, chromosome.values), chromosome.__getstate__()
+
+    def mutate(self, mutationRate, mutationSTDEV):
+        chromosome = self.copy()
+        chromosome.mutate(mutationRate, mutationSTDEV)
+        for column, value in zip(self.generation.columns, chromosome.getValues()):
+            column[self.index] = value
+        if chromosome.dirty:
+            self.invalidateFitness()
+
+    def __setitem__(self, key, value):
+        index = self.chromosomeType.geneIndex.get(key)
+        if index is not None:
+            self.generation.columns[index][self.index] = value
+            self.invalidateFitness()
+
+    def __getitem__(self, item):
+        index = self.chromosomeType.geneIndex.get(item)
+        if index is not None:
+            return self.generation.columns[index].item(self.index)
+
+    def getValueAt(self, index):
+        return self.generation.columns[index].item(self.index)
+
+    def setValueAt(self, index, value):
+        self.generation.columns[index][self.index] = value
+        self.invalidateFitness()
+
+
+class ArrayGeneration(object):
+    """
+    A group of chromosomes stored as one numpy array per gene type instead of one object per gene.
+
+    Every gene type must support columns (see GeneType.supportsColumns).  Selection, crossover, mutation and elitism
+    work on whole columns.  The population attribute holds ArrayChromosome views so that fitness functions and other
+    code written for Chromosome keep working
+    """
+
+    def __init__(self, generationType, columns, fitness=None):
+        """
+        :param generationType: the type of this generation
+        :type generationType: GenerationType
+        :param columns: one numpy array per gene type, in the order of the gene types of the chromosome type
+        :type columns: [numpy.ndarray]
+        :param fitness: the fitness of each individual.  NaN means that the fitness has not been measured
+        :type fitness: numpy.ndarray
+        """
+        self.generationType = generationType
+        self.columns = columns
+        if fitness is None:
+            fitness = numpy.empty(len(columns[0]))
+            fitness.fill(numpy.nan)
+        self.fitness = fitness
+        self.views = None
+        #the most fit individual and fitness statistics, calculated when first needed
+        self.statistics = None
+
+    @classmethod
+    def fromChromosomes(cls, generationType, population):
+        """
+        Pack a list of chromosomes into columns
+        :rtype: ArrayGeneration
+        """
+        geneTypes = generationType.chromosomeType.geneTypes
+        if len(population) == 0:
+            return cls(generationType, [numpy.empty(0, dtype=gType.dtype) for gType in geneTypes])
+        rows = [chromosome.getValues() for chromosome in population]
+        columns = [numpy.array(column, dtype=gType.dtype) for gType, column in zip(geneTypes, zip(*rows))]
+        fitness = numpy.array([numpy.nan if c.dirty or c.fitness is None else c.fitness for c in population],
+                              dtype=float)
+        return cls(generationType, columns, fitness)
+
+    @property
+    def population(self):
+        """
+        A view of each individual in this generation
+        :rtype: [ArrayChromosome]
+        """
+        if self.views is None:
+            self.views = [ArrayChromosome(self, index) for index in xrange(len(self.fitness))]
+        return self.views
+
+    def addChromosomes(self, chromosomes):
+        """
+        Add individuals to this generation
+        :type chromosomes: [Chromosome]
+        """
+        if len(chromosomes) == 0:
+            return
+        other = ArrayGeneration.fromChromosomes(self.generationType, chromosomes)
+        self.columns = [numpy.concatenate((mine, theirs)) for mine, theirs in zip(self.columns, other.columns)]
+        self.fitness = numpy.concatenate((self.fitness, other.fitness))
+        self.views = None
+        self.statistics = None
+
+    def copy(self):
+        """
+        Return a deep copy of this generation
+        :rtype: ArrayGeneration
+        """
+        return ArrayGeneration(self.generationType, [column.copy() for column in self.columns], self.fitness.copy())
+
+    def getNextGeneration(self, size, elitism, randIndividuals, randFitness, mutationRate, mutationSTDEV,
+                          selection=BreedingPool):
+        """
+        Return a new generation of individuals.  See Generation.getNextGeneration
+        :rtype: ArrayGeneration
+        """
+        if numpy.isnan(self.fitness).any():
+            self.doFitnessTests()
+
+        #preserve some elite individuals
+        elite = self.getNMostFitIndices(elitism)
+        newColumns = [[column[elite]] for column in self.columns]
+        newFitness = [self.fitness[elite]]
+
+        #add all individuals with fitness greater than 0 to the breeding population
+        breeding = numpy.flatnonzero(self.fitness > 0)
+        breedingColumns = [column[breeding] for column in self.columns]
+        breedingFitness = self.fitness[breeding]
+
+        #add some randomized individuals to the breeding population
+        if randIndividuals > 0:
+            rando = self.generationType.getRandomGeneration(randIndividuals)
+            rando.doFitnessTests()
+            randoFitness = rando.fitness
+            if randFitness is not None:
+                randoFitness = numpy.maximum(randoFitness, randFitness)
+            breedingColumns = [numpy.concatenate((mine, theirs)) for mine, theirs in zip(breedingColumns, rando.columns)]
+            breedingFitness = numpy.concatenate((breedingFitness, randoFitness))
+
+        #breed a new generation of chromosomes
+        children = size - len(elite)
+        if children > 0:
+            if len(breedingFitness) == 0:
+                raise Exception("No individuals with a fitness greater than 0 are available for breeding")
+            picks = selection(breedingFitness, breedingFitness).getManyIndices(2 * children)
+            mothers = picks[:children]
+            fathers = picks[children:]
+
+            childColumns = []
+            for column in breedingColumns:
+                fromMother = numpy.random.uniform(0.0, 1.0, children) < 0.5
+                childColumns.append(numpy.where(fromMother, column[mothers], column[fathers]))
+            mutateColumns(self.generationType.chromosomeType, childColumns, mutationRate, mutationSTDEV)
+
+            for index, column in enumerate(childColumns):
+                newColumns[index].append(column)
+            childFitness = numpy.empty(children)
+            childFitness.fill(numpy.nan)
+            newFitness.append(childFitness)
+
+        return ArrayGeneration(self.generationType,
+                               [numpy.concatenate(parts) for parts in newColumns],
+                               numpy.concatenate(newFitness))
+
+    def doFitnessTests(self, threads=1, pool=None, cache=None):
+        """
+        Measure the fitness of each individual whose genes have changed since its fitness was last measured
+        :param threads: the number of processes to use if no pool is given
+        :param pool: persistent worker processes used to run the fitness tests
+        :type pool: EvaluationPool
+        :param cache: if provided, individuals whose genes are found in the cache are not tested again
+        :type cache: FitnessCache
+        """
+        self.statistics = None
+        views = [self.population[index] for index in numpy.flatnonzero(numpy.isnan(self.fitness))]
+        if cache is None:
+            self.testChromosomes(views, threads, pool)
+        else:
+            cache.evaluate(views, lambda chromosomes: self.testChromosomes(chromosomes, threads, pool))
+
+    def testChromosomes(self, views, threads=1, pool=None):
+        """
+        Measure the fitness of some of the individuals of this generation.  See doFitnessTests
+        :type views: [ArrayChromosome]
+        :return: the individuals given a failure fitness because their fitness test crashed or took too long
+        :rtype: [ArrayChromosome]
+        """
+        if len(views) == 0:
+            return []
+        chromosomeType = self.generationType.chromosomeType
+
+        if chromosomeType.batchFitnessFunction is not None:
+            rows = numpy.array([view.index for view in views])
+            if chromosomeType.batchFormat == "dict":
+                batch = {}
+                for gType, column in zip(chromosomeType.geneTypes, self.columns):
+                    batch[gType.description] = column[rows]
+            else:
+                batch = numpy.column_stack([column[rows].astype(float) for column in self.columns])
+            chromosomeType.recordBatchFitness(views, chromosomeType.batchFitnessFunction(batch))
+        elif pool is not None:
+            return pool.evaluate(views)
+        elif threads > 1:
+            pool = EvaluationPool(chromosomeType, threads)
+            try:
+                return pool.evaluate(views)
+            finally:
+                pool.shutdown()
+        else:
+            for chromosome in views:
+                chromosome.doFitnessTest()
+        return []
+
+    def getNMostFitIndices(self, N):
+        """
+        Return the indices of the N individuals with the highest fitness, least fit first
+        :rtype: numpy.ndarray
+        """
+        if N <= 0:
+            return numpy.empty(0, dtype=int)
+        fitness = numpy.where(numpy.isnan(self.fitness), -numpy.inf, self.fitness)
+        if N < len(fitness):
+            #only the N most fit individuals are sorted
+            mostFit = numpy.argpartition(fitness, -1 * N)[-1 * N:]
+            return mostFit[numpy.argsort(fitness[mostFit], kind="mergesort")]
+        return numpy.argsort(fitness, kind="mergesort")
+
+    def getStatistics(self):
+        """
+        Return the most fit individual and a summary of the fitness of this generation.  See Generation.getStatistics
+        :rtype: dict
+        """
+        if self.statistics is None:
+            measured = self.fitness[~numpy.isnan(self.fitness)]
+            mostFit = None
+            maximum = minimum = mean = None
+            if len(measured) > 0:
+                maximum = float(measured.max())
+                minimum = float(measured.min())
+                mean = float(measured.mean())
+                if maximum > 0:
+                    mostFit = self.population[int(numpy.nanargmax(self.fitness))]
+            self.statistics = {"mostFit": mostFit, "max": maximum, "min": minimum, "mean": mean,
+                               "count": len(measured)}
+        return self.statistics
+
+    def getMostFit(self):
+        """
+        Return the most fit individual in a generation.  Returns None if no individual is more than "0 fit"
+        :rtype: ArrayChromosome
+        """
+        return self.getStatistics()["mostFit"]
+
+    def getNMostFit(self, N):
+        """
+        Return the N members of this generation that have the highest fitness
+        :rtype: [ArrayChromosome]
+        """
+        return [self.population[index] for index in self.getNMostFitIndices(N)]
+
+    def replaceLeastFit(self, chromosomes):
+        """
+        Replace the least fit members of this generation with the given chromosomes.  The size of the generation does
+        not change, if more chromosomes are given than the generation holds then the last ones are used
+        :type chromosomes: [Chromosome]
+        """
+        count = min(len(chromosomes), len(self.fitness))
+        if count == 0:
+            return
+        fitness = numpy.where(numpy.isnan(self.fitness), -numpy.inf, self.fitness)
+        rows = numpy.argpartition(fitness, count - 1)[:count]
+        other = ArrayGeneration.fromChromosomes(self.generationType, chromosomes[-1 * count:])
+        for column, values in zip(self.columns, other.columns):
+            column[rows] = values
+        self.fitness[rows] = other.fitness
+        self.statistics = None
+
+    def data(self):
+        """
+        Return an object that can be used to convert a generation to yaml
+        """
+        data = {}
+        for index, chromosome in enumerate(self.population):
+            data[index] = chromosome.data()
+        return data
@@ -0,0 +1,144 @@
+import math
+import random
+
+
+def randomBits(length, probability):
+    """
+    Return an integer whose lowest length bits are each set with the given probability, as a mask for a BitVector
+    :rtype: long
+    """
+    if length <= 0 or probability <= 0:
+        return 0
+    if probability == 0.5:
+        return random.getrandbits(length)
+    if probability >= 1:
+        return (1 << length) - 1
+
+    #visit only the set bits, the distance between them follows a geometric distribution
+    buf = bytearray((length + 7) // 8)
+    logMiss = math.log(1.0 - probability)
+    index = -1
+    while True:
+        index += 1 + int(math.log(1.0 - random.random()) / logMiss)
+        if index >= length:
+            break
+        buf[index >> 3] |= 1 << (index & 7)
+    #buf is little endian, int reads the hex digits big endian
+    return int(str(buf[::-1]).encode("hex") or "0", 16)
+
+
+class BitVector(object):
+    """
+    An immutable string of bits packed into a single integer, bit i of the vector is bit i of the integer.
+
+    Fitness functions read bits with vector[i], the number of bits with len(vector) and the number of set bits with
+    vector.count().  Because it is immutable a BitVector is never copied and can be used as a dict key
+    """
+
+    __slots__ = ("bits", "length")
+
+    def __init__(self, bits, length):
+        """
+        :param bits: the bits of the vector, bits above length are discarded
+        :type bits: long
+        :param length: the number of bits
+        :type length: int
+        """
+        object.__setattr__(self, "bits", bits & ((1 << length) - 1))
+        object.__setattr__(self, "length", length)
+
+    @staticmethod
+    def fromBools(values):
+        """
+        Build a vector from a sequence of truth values, values[i] becomes bit i
+        :rtype: BitVector
+        """
+        values = list(values)
+        text = "".join("1" if value else "0" for value in reversed(values))
+        return BitVector(int(text or "0", 2), len(values))
+
+    @staticmethod
+    def fromHex(text, length):
+        """
+        The inverse of hex
+        :rtype: BitVector
+        """
+        return BitVector(int(text or "0", 16), length)
+
+    def hex(self):
+        """
+        Return the bits as a string of hex digits, the most significant first
+        :rtype: str
+        """
+        return "%x" % self.bits
+
+    def flip(self, mask):
+        """
+        Return a copy of this vector with the bits set in mask inverted
+        :rtype: BitVector
+        """
+        return BitVector(self.bits ^ mask, self.length)
+
+    def blend(self, other, mask):
+        """
+        Return a vector taking the bits set in mask from this vector and the other bits from other
+        :rtype: BitVector
+        """
+        return BitVector((self.bits & mask) | (other.bits & ~mask), self.length)
+
+    def count(self):
+        """
+        Return the number of set bits
+        :rtype: int
+        """
+        return bin(self.bits).count("1")
+
+    def toList(self):
+        """
+        Return the bits as a list of bools
+        :rtype: [bool]
+        """
+        text = bin(self.bits)[2:].zfill(self.length)
+        return [character == "1" for character in reversed(text)]
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("BitVector index out of range")
+        return bool((self.bits >> index) & 1)
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        return iter(self.toList())
+
+    def __eq__(self, other):
+        return isinstance(other, BitVector) and self.bits == other.bits and self.length == other.length
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((self.bits, self.length))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("BitVector is immutable")
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return BitVector, (self.bits, self.length)
+
+    def __str__(self):
+        if self.length <= 64:
+            return "".join("1" if bit else "0" for bit in self.toList())
+        return str(self.length) + " bits, " + str(self.count()) + " set"
+
+    def __repr__(self):
+        return "BitVector(" + str(self) + ")"
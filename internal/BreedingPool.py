@@ -1,112 +1,78 @@
+import bisect
 import random
-import math
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 class BreedingPool(object):
     """
     This class is a container for Chromosomes.  Allows efficient selection of chromosomes to be "bred".
 
-    This class implements a binary tree
+    The probability of selecting a chromosome is proportional to its fitness.  The pool keeps a table of cumulative
+    fitness values, a random number between 0 and the total fitness is mapped to a chromosome with a binary search.
+    getMany draws many chromosomes in a single vectorized step when numpy is available
     """
 
-    class node():
+    def __init__(self, population, fitness=None):
         """
-        Each node represents the "value" of a single chromosome.  Used to map a random number to a particular chromosome
+        :param population: the chromosomes that may be selected
+        :param fitness: the fitness of each member of the population.  If None, getFitness() is used
+        :type fitness: [float]
         """
-        def __init__(self, minVal, maxVal, chromosome):
-            self.min = minVal
-            self.max = maxVal
-            self.chromosome = chromosome
-
-            self.left = None
-            self.right = None
+        self.population = population
+        if fitness is None:
+            fitness = [chromosome.getFitness() for chromosome in population]
 
-        def __eq__(self, other):
-            """
-            Given a floating point number, a cmap will return true for "==" if the number
-                falls within the range of the cmap
-            """
-            if type(other) is type(self):
-                return self.min == other.min
-            return self.min <= other and self.max >= other
-        def __ne__(self, other):
-            if type(other) is type(self):
-                return self.min != other.min
-            return not self.__eq__(other)
-        def __lt__(self, other):
-            if type(other) is type(self):
-                return self.min < other.min
-            return self.max < other
-        def __gt__(self, other):
-            if type(other) is type(self):
-                return self.min > other.min
-            return self.min > other
-        def __le__(self, other):
-            if type(other) is type(self):
-                return self.min <= other.min
-            return self.__eq__(other) or self.__lt__(other)
-        def __ge__(self, other):
-            if type(other) is type(self):
-                return self.min >= other.min
-            return self.__eq__(other) or self.__lt__(other)
+        if numpy is not None:
+            self.cumulative = numpy.cumsum(numpy.asarray(fitness, dtype=float))
+        else:
+            self.cumulative = []
+            total = 0.0
+            for value in fitness:
+                total += value
+                self.cumulative.append(total)
 
-    def __init__(self, population):
-        allNodes = []
         self.max = 0.0        #used to track the maximum value, used by random number generator
-        for chromosome in population:
-            increase = chromosome.getFitness()
-            allNodes.append(self.node(self.max, self.max + increase, chromosome))
-            self.max += increase
+        if len(self.cumulative) > 0:
+            self.max = float(self.cumulative[-1])
 
-        allNodes.sort()
-        self.root = self.makeTree(allNodes)
-
-
-    def makeTree(self, pop):
+    def getIndex(self):
         """
-        Given a sorted list of nodes, recursively construct a binary tree
-        :param pop: a sorted list of nodes
-        :return: the root of the tree
+        Select the index of a single member of the population
+        :rtype: int
         """
+        val = random.uniform(0, self.max)
+        if numpy is not None:
+            index = int(numpy.searchsorted(self.cumulative, val, side="right"))
+        else:
+            index = bisect.bisect_right(self.cumulative, val)
+        return min(index, len(self.cumulative) - 1)
 
-        if len(pop) == 0:
-            return None
-        elif len(pop) == 1:
-            return pop[0]
-
-
-        middleIndex = int(math.floor(len(pop) / 2))
-        leftList = pop[:middleIndex]
-        root = pop[middleIndex]
-        rightList = pop[middleIndex+1:]
-
-        root.left = self.makeTree(leftList)
-        root.right = self.makeTree(rightList)
-
-        return root
+    def getManyIndices(self, k):
+        """
+        Select the indices of k members of the population, with replacement
+        """
+        if numpy is None:
+            return [self.getIndex() for i in xrange(k)]
+        indices = numpy.searchsorted(self.cumulative, numpy.random.uniform(0, self.max, k), side="right")
+        return numpy.minimum(indices, len(self.cumulative) - 1)
 
-    def findChromosome(self, n, target):
+    def get(self):
         """
-        Recursively search the tree for a chromosome
-        :param n: a node in the tree
-        :type n: node
-        :param target: look for a node that equals this target
-        :type target: float
+        Select a single chromosome.  Returns None if the pool is empty
         :rtype: Chromosome
         """
-
-        if n is None:
-            return None
-
-        if n == target:
-            return n.chromosome
-        elif target < n:
-            return self.findChromosome(n.left, target)
-        elif target > n:
-            return self.findChromosome(n.right, target)
-        else:
+        if len(self.population) == 0:
             return None
+        return self.population[self.getIndex()]
 
-
-    def get(self):
-        val = random.uniform(0, self.max)
-        return self.findChromosome(self.root, val)
\ No newline at end of file
+    def getMany(self, k):
+        """
+        Select k chromosomes, with replacement
+        :rtype: [Chromosome]
+        """
+        if len(self.population) == 0:
+            return [None] * k
+        return [self.population[index] for index in self.getManyIndices(k)]
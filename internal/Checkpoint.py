@@ -0,0 +1,134 @@
+"""
+A binary checkpoint holds a whole generation in a form that can be memory mapped:
+
+    8 bytes         the magic string "PYVOCKPT"
+    4 bytes         the length of the header, little endian unsigned int
+    header          JSON: the format version, the number of individuals, the description, dtype and offset of the
+                    column of each gene type and the offset of the fitness column
+    padding         up to a multiple of 8 bytes
+    columns         the raw values of each column, offsets are relative to the end of the padding
+
+A fitness of NaN means that the fitness of the individual has not been measured
+"""
+
+import json
+import struct
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from ArrayGeneration import *
+
+
+MAGIC = "PYVOCKPT"
+VERSION = 1
+
+
+def align(position):
+    return (position + 7) // 8 * 8
+
+
+def isCheckpoint(source):
+    """
+    Return True if a file starts with the checkpoint magic string
+    :type source: str
+    """
+    fobj = open(source, "rb")
+    try:
+        return fobj.read(len(MAGIC)) == MAGIC
+    finally:
+        fobj.close()
+
+
+def checkCheckpointTypes(geneTypes):
+    """
+    Raise an exception unless chromosomes made of these gene types can be written to a checkpoint.  Every gene type
+    must have a dtype
+    :type geneTypes: [GeneType]
+    """
+    if numpy is None:
+        raise Exception("numpy is required to write a checkpoint")
+    for gType in geneTypes:
+        if gType.dtype is None:
+            raise Exception("Gene type " + str(gType.description) + " cannot be written to a checkpoint")
+
+
+def writeCheckpoint(generation, target):
+    """
+    Write a generation to a binary checkpoint.  Every gene type must have a dtype
+    :type generation: Generation
+    :type target: str
+    """
+    geneTypes = generation.generationType.chromosomeType.geneTypes
+    checkCheckpointTypes(geneTypes)
+    if not isinstance(generation, ArrayGeneration):
+        generation = ArrayGeneration.fromChromosomes(generation.generationType, generation.population)
+
+    size = len(generation.fitness)
+    columns = [numpy.ascontiguousarray(column, dtype=gType.dtype) for gType, column in zip(geneTypes, generation.columns)]
+    columns.append(numpy.ascontiguousarray(generation.fitness, dtype="float64"))
+
+    offsets = []
+    offset = 0
+    for column in columns:
+        offsets.append(offset)
+        offset = align(offset + column.nbytes)
+
+    header = {"version": VERSION,
+              "size": size,
+              "genes": [{"description": gType.description, "dtype": gType.dtype, "offset": columnOffset}
+                        for gType, columnOffset in zip(geneTypes, offsets)],
+              "fitness": {"offset": offsets[-1]}}
+    header = json.dumps(header)
+    dataStart = align(len(MAGIC) + 4 + len(header))
+
+    fobj = open(target, "wb")
+    try:
+        fobj.write(MAGIC)
+        fobj.write(struct.pack("<I", len(header)))
+        fobj.write(header)
+        for column, columnOffset in zip(columns, offsets):
+            fobj.seek(dataStart + columnOffset)
+            fobj.write(column.tostring())
+    finally:
+        fobj.close()
+
+
+def openCheckpoint(source, geneTypes):
+    """
+    Memory map the columns of a binary checkpoint.  The arrays are copy-on-write, changing them does not change the file
+    :param geneTypes: the gene types the checkpoint must contain, in order
+    :type geneTypes: [GeneType]
+    :return: (columns, fitness)
+    """
+    if numpy is None:
+        raise Exception("numpy is required to read a checkpoint")
+    fobj = open(source, "rb")
+    try:
+        if fobj.read(len(MAGIC)) != MAGIC:
+            raise Exception(str(source) + " is not a checkpoint")
+        headerLength = struct.unpack("<I", fobj.read(4))[0]
+        header = json.loads(fobj.read(headerLength))
+    finally:
+        fobj.close()
+    if header["version"] != VERSION:
+        raise Exception("Unsupported checkpoint version: " + str(header["version"]))
+
+    expected = [(gType.description, gType.dtype) for gType in geneTypes]
+    found = [(gene["description"], gene["dtype"]) for gene in header["genes"]]
+    if expected != found:
+        raise Exception("The genes in " + str(source) + " do not match the chromosome type: " + str(found))
+
+    size = header["size"]
+    dataStart = align(len(MAGIC) + 4 + headerLength)
+    if size == 0:
+        columns = [numpy.empty(0, dtype=gene["dtype"]) for gene in header["genes"]]
+        return columns, numpy.empty(0)
+
+    columns = [numpy.memmap(source, dtype=gene["dtype"], mode="c", offset=dataStart + gene["offset"], shape=(size,))
+               for gene in header["genes"]]
+    fitness = numpy.memmap(source, dtype="float64", mode="c", offset=dataStart + header["fitness"]["offset"],
+                           shape=(size,))
+    return columns, fitness
@@ -1,38 +1,53 @@
 import random
-import math
+
+from Gene import *
+from MutationSampler import *
 
 class Chromosome(object):
+    """
+    An individual.  Gene values are stored by position, in the order of the gene types of the chromosome type, and the
+    object has no __dict__, so a chromosome costs little more than the list of its values
+    """
+
+    __slots__ = ("chromosomeType", "values", "fitness", "perfectMatch", "dirty")
 
     class PerfectMatch(Exception):
         def __init___(self, perfectSpecimen):
             Exception.__init__(self, "Perfect match found")
 
-    def __init__(self, chromosomeType, genes):
+    def __init__(self, chromosomeType, genes=None, values=None):
         """
         :param chromosomeType: a template for the chromosome
         :type chromosomeType: ChromosomeType
-        :param genes: a list of genes
-        :param mutationRate: the average number of genes that will be mutated in each round
-        :type mutationRate: float
-        :param mutationSTDEV: the standard deviation of the number of genes to be mutated each round
-        :type mutationSTDEV: float
+        :param genes: a list of genes, in the order of the gene types of the chromosome type.  Only their values are
+                        kept
         :type genes: [Gene]
+        :param values: the gene values, used instead of genes.  The list is kept, not copied
+        :type values: list
         """
         self.chromosomeType = chromosomeType
-        self.genes = genes
+        if values is None:
+            values = [gene.value for gene in genes]
+        self.values = values
         self.fitness = None
 
         self.perfectMatch = False
+        #True if the genes have changed since the fitness was last measured
+        self.dirty = True
 
     def copy(self):
         """
         Create a deep copy of this chromosome
         :rtype: Chromosome
         """
-        newGenes = []
-        for gene in self.genes:
-            newGenes.append(gene.copy())
-        return Chromosome(self.chromosomeType, newGenes)
+        newValues = [gType.copyValue(value) for gType, value in zip(self.chromosomeType.geneTypes, self.values)]
+        newChromosome = Chromosome(self.chromosomeType, values=newValues)
+
+        #the genes are identical, so the fitness is too
+        newChromosome.fitness = self.fitness
+        newChromosome.perfectMatch = self.perfectMatch
+        newChromosome.dirty = self.dirty
+        return newChromosome
 
     def mutate(self, mutationRate, mutationSTDEV):
         """
@@ -44,18 +59,39 @@ class Chromosome(object):
         :param mutationSTDEV: genes are mutated a number of times depending on a normal distribution, This is the
                                 standard deviation
         """
-        for gene in self.genes:
-            mutations = random.normalvariate(mutationRate, mutationSTDEV)
-            wholeMutations = int(math.floor(mutations))
-            partialMutations = mutationRate - wholeMutations
-            if partialMutations > random.uniform(0, 1):
-                wholeMutations += 1
-            for mutation in xrange(wholeMutations):
-                gene.mutate(self)
+        #only the genes that are mutated are visited, see MutationSampler
+        mutated = False
+        geneTypes = self.chromosomeType.geneTypes
+        for index, mutations in getMutationSampler(mutationRate, mutationSTDEV).sample(len(self.values)):
+            mutator = geneTypes[index].mutator
+            for mutation in xrange(mutations):
+                self.values[index] = mutator(self.values[index], self)
+            mutated = True
+
+        #any fitness measured before the mutations is no longer valid
+        if mutated:
+            self.invalidateFitness()
+
+    def invalidateFitness(self):
+        """
+        Forget the measured fitness because the genes have changed.  The chromosome will be tested again
+        """
+        self.fitness = None
+        self.dirty = True
 
 
     def doFitnessTest(self):
-        self.fitness = self.chromosomeType.fitnessFunction(self)
+        if self.chromosomeType.fitnessFunction is None:
+            self.chromosomeType.doBatchFitnessTests([self])
+        else:
+            self.setFitness(self.chromosomeType.fitnessFunction(self))
+
+    def setFitness(self, fitness):
+        """
+        Record the result of a fitness test.  A fitness of None means that a perfect match has been found
+        """
+        self.fitness = fitness
+        self.dirty = False
 
         #we have tested the fitness.  If it is still None, then a perfect match must have been found
         if self.fitness is None:
@@ -69,12 +105,28 @@ class Chromosome(object):
         """
         if self.perfectMatch:
             return "perfect match"
-        elif self.fitness is None:
+        elif self.dirty:
             self.doFitnessTest()
             return self.fitness
         else:
             return self.fitness
 
+    def getValues(self):
+        """
+        Return the values of all genes, in the order of the gene types of the chromosome type
+        :rtype: list
+        """
+        return list(self.values)
+
+    @property
+    def genes(self):
+        """
+        The genes of this individual, built from its values.  Changing them does not change the chromosome, use
+        __setitem__ or setValueAt instead
+        :rtype: [Gene]
+        """
+        return [Gene(gType, value) for gType, value in zip(self.chromosomeType.geneTypes, self.getValues())]
+
     def __str__(self):
         result = "[\n"
         for gene in self.genes:
@@ -88,19 +140,32 @@ class Chromosome(object):
         """
         Set the value of a particular gene
         """
-        for gene in self.genes:
-            if gene.geneType.description == key:
-                gene.value = value
-                break
+        index = self.chromosomeType.geneIndex.get(key)
+        if index is not None:
+            self.values[index] = value
+            self.invalidateFitness()
 
     def __getitem__(self, item):
         """
         Get the value of a particular gene
         :rtype: Gene
         """
-        for gene in self.genes:
-            if gene.geneType.description == item:
-                return gene.value
+        index = self.chromosomeType.geneIndex.get(item)
+        if index is not None:
+            return self.values[index]
+
+    def getValueAt(self, index):
+        """
+        Get the value of the gene at a position, positions follow the order of the gene types of the chromosome type
+        """
+        return self.values[index]
+
+    def setValueAt(self, index, value):
+        """
+        Set the value of the gene at a position, positions follow the order of the gene types of the chromosome type
+        """
+        self.values[index] = value
+        self.invalidateFitness()
 
     def __add__(self, other):
         """
@@ -108,15 +173,16 @@ class Chromosome(object):
         :type other: Chromosome
         :rtype: Chromosome
         """
-        newGenes = []
-        for geneIndex in xrange(len(self.genes)):
-            chosen = None
-            if self.genes[geneIndex].geneType.combiner is not None:
-                chosen = self.genes[geneIndex].geneType.combiner(self.genes[geneIndex], other.genes[geneIndex])
+        mine = self.getValues()
+        theirs = other.getValues()
+        newValues = []
+        for gType, value, otherValue in zip(self.chromosomeType.geneTypes, mine, theirs):
+            if gType.combiner is not None:
+                chosen = gType.combiner(Gene(gType, value), Gene(gType, otherValue)).value
             else:
-                chosen = random.choice((self.genes[geneIndex], other.genes[geneIndex]))
-            newGenes.append(chosen.copy())
-        return Chromosome(self.chromosomeType, newGenes)
+                chosen = random.choice((value, otherValue))
+            newValues.append(gType.copyValue(chosen))
+        return Chromosome(self.chromosomeType, values=newValues)
 
     def __lt__(self, other):
         return self.getFitness() < other.getFitness()
@@ -143,6 +209,13 @@ class Chromosome(object):
         data = {}
         data["fitness"] = self.getFitness()
         data["genes"] = {}
-        for gene in self.genes:
-            data["genes"][gene.geneType.description] = gene.value
-        return data
\ No newline at end of file
+        for gType, value in zip(self.chromosomeType.geneTypes, self.getValues()):
+            data["genes"][gType.description] = gType.encode(value)
+        return data
+
+    def __getstate__(self):
+        return dict((name, getattr(self, name)) for name in Chromosome.__slots__)
+
+    def __setstate__(self, state):
+        for name, value in state.iteritems():
+            setattr(self, name, value)
\ No newline at end of file
@@ -1,30 +1,50 @@
 import yaml
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 from Gene import *
 from Chromosome import *
 
 class ChromosomeType(object):
 
 
-    def __init__(self, fitnessFunction, geneTypes):
+    def __init__(self, fitnessFunction, geneTypes, batchFitnessFunction=None, batchFormat="array"):
         """
         :param fitnessFunction: A function to measure the fitness of an individual
         :type fitnessFunction: (Chromosome) -> float
         :param geneTypes: a list of gene types that make up a chromosome of this type
         :type geneTypes: [GeneType]
+        :param batchFitnessFunction: An optional function to measure the fitness of many individuals at once.  It is
+                                        given the gene values of all individuals (see batchFormat) and must return a
+                                        sequence with one fitness per individual.  None indicates a perfect match
+        :param batchFormat: "array" passes a 2-D numpy array (individuals x genes, columns in the order of geneTypes),
+                                "dict" passes a dict mapping each gene description to a numpy array of its values
+        :type batchFormat: str
         """
+        if batchFormat not in ("array", "dict"):
+            raise Exception("Unknown batch format: " + str(batchFormat))
+        if fitnessFunction is None and batchFitnessFunction is None:
+            raise Exception("A fitness function or a batch fitness function is required")
+
         self.geneTypes = geneTypes                       #type: [GeneType]
         self.fitnessFunction = fitnessFunction           #type: (Chromosome) -> float
 
+        #maps the description of each gene type to its position in a chromosome
+        self.geneIndex = {}                              #type: {str: int}
+        for index, gType in enumerate(geneTypes):
+            self.geneIndex[gType.description] = index
+        self.batchFitnessFunction = batchFitnessFunction
+        self.batchFormat = batchFormat
+
 
     def getRandomChromosome(self):
         """
         Generate a new individual randomly
         """
-        genes = []
-        for gType in self.geneTypes:
-            genes.append(gType.getRandomGene())
-        return Chromosome(self, genes)
+        return Chromosome(self, values=[gType.generator() for gType in self.geneTypes])
 
     def fromYAML(self, data):
         """
@@ -33,13 +53,74 @@ class ChromosomeType(object):
         """
         if type(data) is str:
             data = yaml.load(data)
-        genes = []
-        for key in data["genes"]:
-            for gType in self.geneTypes:
-                if gType.description == key:
-                    genes.append(Gene(gType, data["genes"][key]))
-        return Chromosome(self, genes)
+        values = []
+        for gType in self.geneTypes:
+            if gType.description in data["genes"]:
+                values.append(gType.decode(data["genes"][gType.description]))
+            else:
+                #values are stored by position, a gene missing from the data is given a random value
+                values.append(gType.generator())
+        chromosome = Chromosome(self, values=values)
+
+        #a fitness that was already measured does not need to be measured again
+        if type(data.get("fitness")) in (int, long, float):
+            chromosome.fitness = data["fitness"]
+            chromosome.dirty = False
+        return chromosome
+
+    def fromValues(self, values):
+        """
+        Build a chromosome from a list of gene values, given in the same order as the gene types
+        :rtype: Chromosome
+        """
+        if len(values) != len(self.geneTypes):
+            raise Exception("Expected " + str(len(self.geneTypes)) + " gene values, got " + str(len(values)))
+        return Chromosome(self, values=list(values))
+
+
+    def doBatchFitnessTests(self, chromosomes):
+        """
+        Measure the fitness of the given chromosomes with a single call to the batch fitness function.  Raises
+        Chromosome.PerfectMatch if a perfect match is found
+        :type chromosomes: [Chromosome]
+        """
+        if numpy is None:
+            raise Exception("numpy is required to use a batch fitness function")
+        if len(chromosomes) == 0:
+            return
+
+        values = [chromosome.getValues() for chromosome in chromosomes]
+        if self.batchFormat == "dict":
+            batch = {}
+            for gType, column in zip(self.geneTypes, zip(*values)):
+                batch[gType.description] = numpy.array(column)
+        else:
+            batch = numpy.array(values, dtype=float)
+
+        self.recordBatchFitness(chromosomes, self.batchFitnessFunction(batch))
+
+    def recordBatchFitness(self, chromosomes, results):
+        """
+        Store the values returned by the batch fitness function.  Raises Chromosome.PerfectMatch if a perfect match is
+        found
+        :type chromosomes: [Chromosome]
+        :param results: one fitness value per chromosome
+        """
+        if len(results) != len(chromosomes):
+            raise Exception("The batch fitness function returned " + str(len(results)) + " values for " +
+                            str(len(chromosomes)) + " chromosomes")
 
+        perfectMatch = None
+        for chromosome, fitness in zip(chromosomes, results):
+            if fitness is not None:
+                fitness = float(fitness)
+            try:
+                chromosome.setFitness(fitness)
+            except Chromosome.PerfectMatch as e:
+                if perfectMatch is None:
+                    perfectMatch = e
+        if perfectMatch is not None:
+            raise perfectMatch
 
     def __str__(self):
         result = "[\n"
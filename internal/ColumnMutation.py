@@ -0,0 +1,89 @@
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from MutationSampler import *
+
+
+#when fewer genes than this are mutated, visiting only the mutated genes of each chromosome is faster than packing
+#every gene into columns
+COLUMN_MUTATION_THRESHOLD = 0.2
+
+
+class ColumnSelection(object):
+    """
+    Gives access to the values of some rows of a set of columns by gene description.  This is what a columnMutator
+    receives in place of a chromosome
+    """
+
+    def __init__(self, geneIndex, columns, rows):
+        self.geneIndex = geneIndex
+        self.columns = columns
+        self.rows = rows
+
+    def __getitem__(self, item):
+        return self.columns[self.geneIndex[item]][self.rows]
+
+
+def supportsColumnMutation(chromosomeType):
+    """
+    Return True if every gene type of a chromosome type can be mutated a whole column at a time
+    :type chromosomeType: ChromosomeType
+    """
+    if numpy is None:
+        return False
+    for gType in chromosomeType.geneTypes:
+        if gType.dtype is None or gType.columnMutator is None:
+            return False
+    return True
+
+
+def prefersColumnMutation(chromosomeType, mutationRate, mutationSTDEV):
+    """
+    Return True if mutateChromosomes is expected to be faster than mutating each chromosome on its own
+    :type chromosomeType: ChromosomeType
+    """
+    return (supportsColumnMutation(chromosomeType) and
+            getMutationSampler(mutationRate, mutationSTDEV).touchProbability >= COLUMN_MUTATION_THRESHOLD)
+
+
+def mutateColumns(chromosomeType, columns, mutationRate, mutationSTDEV):
+    """
+    Mutate every row of the given columns in place, following the same rules as Chromosome.mutate
+    :type chromosomeType: ChromosomeType
+    :param columns: one numpy array per gene type
+    """
+    geneIndex = chromosomeType.geneIndex
+    geneTypes = chromosomeType.geneTypes
+    sampler = getMutationSampler(mutationRate, mutationSTDEV)
+
+    #only the genes that are mutated are drawn, see MutationSampler
+    for index, rows, mutations in sampler.sampleColumns(len(columns), len(columns[0])):
+        #a gene mutated n times is passed through the column mutator n times
+        count = 0
+        while True:
+            selected = rows[mutations > count]
+            if len(selected) == 0:
+                break
+            columns[index][selected] = geneTypes[index].columnMutator(columns[index][selected],
+                                                                      ColumnSelection(geneIndex, columns, selected))
+            count += 1
+
+
+def mutateChromosomes(chromosomes, mutationRate, mutationSTDEV):
+    """
+    Mutate a list of chromosomes of the same type, one column of gene values at a time.  See supportsColumnMutation
+    :type chromosomes: [Chromosome]
+    """
+    if len(chromosomes) == 0:
+        return
+    chromosomeType = chromosomes[0].chromosomeType
+    rows = [chromosome.getValues() for chromosome in chromosomes]
+    columns = [numpy.array(column, dtype=gType.dtype) for gType, column in zip(chromosomeType.geneTypes, zip(*rows))]
+    mutateColumns(chromosomeType, columns, mutationRate, mutationSTDEV)
+
+    for chromosome, before, after in zip(chromosomes, rows, zip(*[column.tolist() for column in columns])):
+        if list(after) != before:
+            chromosome.values = list(after)
+            chromosome.invalidateFitness()
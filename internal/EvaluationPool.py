@@ -0,0 +1,407 @@
+import ctypes
+import math
+import select
+import signal
+import time
+from multiprocessing import Process, Pipe
+from multiprocessing.sharedctypes import RawArray
+
+from Chromosome import *
+from SharedPopulation import *
+
+
+def measureFitness(chromosomeType, values):
+    """
+    Rebuild a chromosome from its gene values and return its fitness, None for a perfect match
+    """
+    chromosome = chromosomeType.fromValues(values)
+    try:
+        chromosome.doFitnessTest()
+    except Chromosome.PerfectMatch:
+        pass
+    return chromosome.fitness
+
+
+def evaluationWorker(chromosomeType, workerId, connection, shared=None, progress=None, reportEach=False):
+    """
+    The main loop of a worker process.  Receives (taskId, start, end, batch) tasks.  If batch is a list of gene values
+    their fitness values are sent back, if batch is None the gene values of rows start to end - 1 are read from shared
+    memory and their fitness is written there
+    :param chromosomeType: used to rebuild chromosomes from their gene values
+    :type chromosomeType: ChromosomeType
+    :param workerId: the index of this worker in the pool
+    :param connection: the end of a pipe that tasks are received from.  (workerId, taskId, row, [fitness]) tuples are
+                        sent back through it, the fitness values are those of rows row, row + 1...  The list is None
+                        when the fitness values of the whole task were written to shared memory
+    :type shared: SharedPopulation
+    :param progress: shared memory counting the chromosomes of the current task that each worker has finished
+    :param reportEach: if True and shared is not used, the fitness of each chromosome is sent as soon as it is known
+    """
+    #the parent process is responsible for handling ctrl-c
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    while True:
+        task = connection.recv()
+        if task is None:
+            break
+        taskId, start, end, batch = task
+        if batch is None:
+            for row, values in enumerate(shared.getRows(start, end), start):
+                shared.setFitness(row, measureFitness(chromosomeType, values))
+                progress[workerId] += 1
+            connection.send((workerId, taskId, start, None))
+        elif reportEach:
+            for row, values in enumerate(batch, start):
+                fitness = measureFitness(chromosomeType, values)
+                progress[workerId] += 1
+                connection.send((workerId, taskId, row, [fitness]))
+        else:
+            fitness = []
+            for values in batch:
+                fitness.append(measureFitness(chromosomeType, values))
+                progress[workerId] += 1
+            connection.send((workerId, taskId, start, fitness))
+
+
+class EvaluationPool(object):
+    """
+    A group of long lived worker processes used to measure the fitness of chromosomes.
+
+    The workers are forked once and reused for every generation.  Only the gene values of the chromosomes that need
+    to be tested are sent to the workers, only their fitness values are sent back.
+
+    If the pool has a sharedCapacity, gene values are packed into shared memory that the workers mapped when they were
+    started and fitness values are written back to it, only row numbers are sent to the workers.  This is used when
+    every gene type has a numeric dtype and the chromosomes fit, otherwise gene values are sent through the pipes.
+
+    Work is either split into one fixed slice per worker ("static") or handed out in small chunks to whichever worker
+    becomes idle first ("dynamic").  Dynamic scheduling keeps every worker busy when fitness tests vary in cost.
+
+    Single chromosomes can also be handed to idle workers with submit and their results picked up with collect, this
+    is used by steady state runs which do not test a whole generation at once.
+
+    Each worker has its own pipe, so killing one cannot corrupt the results of the others.  Workers count the
+    chromosomes they have finished in shared memory.  A worker that dies, or that spends more than timeout seconds on
+    a single chromosome, is killed and replaced.  The first chromosome of its unit of work that it had not finished is
+    the one responsible and is given failureFitness, the chromosomes after it are handed out again.  When a timeout is
+    set and shared memory is not used, workers send each fitness value as soon as it is known, so the results of a
+    failed unit of work are not lost.
+    """
+
+    SCHEDULING_MODES = ("static", "dynamic")
+    #the number of seconds idle workers are given to exit when the pool is shut down
+    SHUTDOWN_TIMEOUT = 5.0
+
+    def __init__(self, chromosomeType, processes, scheduling="static", chunkSize=1, sharedCapacity=0, timeout=None,
+                 failureFitness=0.0):
+        """
+        :param chromosomeType: the type of the chromosomes that will be tested
+        :type chromosomeType: ChromosomeType
+        :param processes: the number of worker processes
+        :type processes: int
+        :param scheduling: either "static" or "dynamic"
+        :type scheduling: str
+        :param chunkSize: the number of chromosomes in each unit of work handed out by dynamic scheduling
+        :type chunkSize: int
+        :param sharedCapacity: the number of chromosomes that fit in shared memory.  0 disables shared memory
+        :type sharedCapacity: int
+        :param timeout: the number of seconds a fitness test may take.  None means no limit
+        :type timeout: float
+        :param failureFitness: the fitness given to a chromosome whose fitness test crashed or took too long
+        :type failureFitness: float
+        """
+        if failureFitness is None:
+            raise Exception("failureFitness cannot be None")
+        if scheduling not in self.SCHEDULING_MODES:
+            raise Exception("Unknown scheduling mode: " + str(scheduling))
+        if chunkSize < 1:
+            raise Exception("chunkSize must be at least 1")
+
+        self.chromosomeType = chromosomeType
+        self.processes = processes
+        self.scheduling = scheduling
+        self.chunkSize = chunkSize
+        self.timeout = timeout
+        self.failureFitness = failureFitness
+        self.timeouts = 0
+        self.crashes = 0
+        self.restarts = 0
+        self.shared = None
+        if sharedCapacity > 0 and supportsSharedMemory(chromosomeType.geneTypes):
+            self.shared = SharedPopulation(chromosomeType.geneTypes, sharedCapacity)
+        #the number of chromosomes of its current task that each worker has finished
+        self.progress = RawArray(ctypes.c_int, processes)
+        self.workers = [None] * processes
+        self.connections = [None] * processes
+        for workerId in xrange(processes):
+            self.startWorker(workerId)
+        self.nextTaskId = 0
+
+        self.idle = range(processes)
+        #chromosomes started by submit, taskId -> (chromosome, workerId, deadline)
+        self.submitted = {}
+
+    def startWorker(self, workerId):
+        parentEnd, childEnd = Pipe()
+        p = Process(target=evaluationWorker, args=(self.chromosomeType, workerId, childEnd, self.shared, self.progress,
+                                                   self.timeout is not None))
+        p.daemon = True
+        p.start()
+        self.workers[workerId] = p
+        self.connections[workerId] = parentEnd
+
+    def restartWorker(self, workerId):
+        """
+        Kill a worker, if it is still running, and start a new one in its place.  The new worker is idle
+        """
+        p = self.workers[workerId]
+        if p.is_alive():
+            p.terminate()
+        p.join()
+        self.connections[workerId].close()
+        self.startWorker(workerId)
+        self.restarts += 1
+        self.idle.append(workerId)
+
+    def receive(self, workerIds, timeout):
+        """
+        Wait up to timeout seconds for a result from one of the given workers
+        :return: a (workerId, taskId, row, [fitness]) tuple, or None if no result arrived in time
+        """
+        connections = dict((self.connections[workerId].fileno(), workerId) for workerId in workerIds)
+        if not connections:
+            time.sleep(timeout)
+            return None
+        try:
+            ready = select.select(connections.keys(), [], [], timeout)[0]
+        except select.error:
+            #interrupted by a signal
+            return None
+        for fd in ready:
+            try:
+                return self.connections[connections[fd]].recv()
+            except (EOFError, IOError):
+                #the worker died, checkWorker will notice
+                pass
+        return None
+
+    def sendTask(self, workerId, taskId, start, end, batch):
+        """
+        Hand a unit of work to an idle worker
+        """
+        self.progress[workerId] = 0
+        self.connections[workerId].send((taskId, start, end, batch))
+
+    def getDeadline(self):
+        """
+        Return the time by which a worker must finish the chromosome it starts now
+        """
+        if self.timeout is None:
+            return None
+        return time.time() + self.timeout
+
+    def checkWorker(self, workerId, deadline):
+        """
+        :return: "crash" if a busy worker has died, "timeout" if it has run past its deadline, otherwise None
+        """
+        if not self.workers[workerId].is_alive():
+            return "crash"
+        if deadline is not None and time.time() > deadline:
+            return "timeout"
+        return None
+
+    def recordFailure(self, chromosome, failure):
+        """
+        Give failureFitness to a chromosome whose fitness test crashed or timed out
+        """
+        if failure == "crash":
+            self.crashes += 1
+        else:
+            self.timeouts += 1
+        chromosome.setFitness(self.failureFitness)
+
+    def makeTasks(self, count):
+        """
+        Split the indices [0, count) into units of work.  Static scheduling makes one contiguous slice per worker,
+        dynamic scheduling makes slices of chunkSize
+        :return: a list of (start, end) tuples
+        """
+        if self.scheduling == "dynamic":
+            return [(begin, min(begin + self.chunkSize, count)) for begin in xrange(0, count, self.chunkSize)]
+
+        tasks = []
+        begin = 0
+        chunksize = int(math.floor(count / self.processes))
+        for t in xrange(self.processes):
+            if t + 1 == self.processes: #the last worker gets all remaining chromosomes
+                tasks.append((begin, count))
+            else:
+                tasks.append((begin, begin + chunksize))
+            begin += chunksize
+        return [task for task in tasks if task[1] > task[0]]
+
+    def evaluate(self, chromosomes):
+        """
+        Measure the fitness of each of the given chromosomes.  Raises Chromosome.PerfectMatch if a perfect match is
+        found, after all outstanding work has been collected
+        :type chromosomes: [Chromosome]
+        :return: the chromosomes that were given failureFitness because their fitness test crashed or took too long
+        :rtype: [Chromosome]
+        """
+        if self.submitted:
+            raise Exception("evaluate cannot be used while submitted chromosomes are being tested")
+        useShared = self.shared is not None and len(chromosomes) <= self.shared.capacity
+        if useShared:
+            self.shared.pack(chromosomes)
+        pending = self.makeTasks(len(chromosomes))
+        pending.reverse()
+        #taskId -> [start, end, workerId, next row without a result, finished count, deadline]
+        running = {}
+        failed = []
+        perfectMatch = []
+
+        def record(start, fitness):
+            for offset, value in enumerate(fitness):
+                try:
+                    chromosomes[start + offset].setFitness(value)
+                except Chromosome.PerfectMatch as e:
+                    if not perfectMatch:
+                        perfectMatch.append(e)
+
+        while pending or running:
+            #hand out work to idle workers, unless a perfect match means the remaining work is not needed
+            while pending and self.idle and not perfectMatch:
+                start, end = pending.pop()
+                workerId = self.idle.pop()
+                taskId = self.nextTaskId
+                self.nextTaskId += 1
+                running[taskId] = [start, end, workerId, start, 0, self.getDeadline()]
+                if useShared:
+                    self.sendTask(workerId, taskId, start, end, None)
+                else:
+                    values = [chromosome.getValues() for chromosome in chromosomes[start:end]]
+                    self.sendTask(workerId, taskId, start, end, values)
+            if perfectMatch:
+                pending = []
+                if not running:
+                    break
+
+            #a timeout allows signal handlers to run while waiting
+            result = self.receive([task[2] for task in running.values()], 0.1)
+            taskId = None
+            if result is not None:
+                workerId, taskId, row, fitness = result
+            #results from a worker that has been killed are ignored
+            if taskId in running:
+                task = running[taskId]
+                start, end, workerId = task[:3]
+                if fitness is None:
+                    fitness = [self.shared.getFitness(index) for index in xrange(task[3], end)]
+                    row = task[3]
+                record(row, fitness)
+                task[3] = row + len(fitness)
+                if task[3] >= end:
+                    del running[taskId]
+                    self.idle.append(workerId)
+
+            for taskId, task in running.items():
+                start, end, workerId, received, finished, deadline = task
+                #every chromosome gets timeout seconds, counted from when the previous one finished
+                progress = self.progress[workerId]
+                if progress != finished:
+                    task[4] = progress
+                    task[5] = self.getDeadline()
+                failure = self.checkWorker(workerId, task[5])
+                if failure is None:
+                    continue
+                del running[taskId]
+                self.restartWorker(workerId)
+                culprit = start + self.progress[workerId]
+                if useShared:
+                    #the fitness of every finished chromosome is already in shared memory
+                    record(received, [self.shared.getFitness(index) for index in xrange(received, culprit)])
+                elif culprit > received:
+                    #finished, but the results were lost with the worker
+                    pending.append((received, culprit))
+                if culprit < end:
+                    self.recordFailure(chromosomes[culprit], failure)
+                    failed.append(chromosomes[culprit])
+                    if culprit + 1 < end:
+                        pending.append((culprit + 1, end))
+
+        if perfectMatch:
+            raise perfectMatch[0]
+        return failed
+
+    def submit(self, chromosome):
+        """
+        Start measuring the fitness of a single chromosome on an idle worker, without waiting for the result.  See
+        collect
+        :type chromosome: Chromosome
+        :return: False if every worker is busy
+        """
+        if not self.idle:
+            return False
+        workerId = self.idle.pop()
+        taskId = self.nextTaskId
+        self.nextTaskId += 1
+        self.submitted[taskId] = (chromosome, workerId, self.getDeadline())
+        self.sendTask(workerId, taskId, 0, 1, [chromosome.getValues()])
+        return True
+
+    def collect(self, timeout=0.1):
+        """
+        Wait up to timeout seconds for one of the submitted chromosomes to be tested, or to fail.  Raises
+        Chromosome.PerfectMatch if it is a perfect match
+        :return: the tested chromosome, or None if no result arrived in time
+        :rtype: Chromosome
+        """
+        result = self.receive([workerId for chromosome, workerId, deadline in self.submitted.values()], timeout)
+        taskId = None
+        if result is not None:
+            workerId, taskId, row, fitness = result
+        if taskId in self.submitted:
+            chromosome, workerId, deadline = self.submitted.pop(taskId)
+            self.idle.append(workerId)
+            chromosome.setFitness(fitness[0])
+            return chromosome
+
+        for taskId, (chromosome, workerId, deadline) in self.submitted.items():
+            failure = self.checkWorker(workerId, deadline)
+            if failure is not None:
+                del self.submitted[taskId]
+                self.restartWorker(workerId)
+                self.recordFailure(chromosome, failure)
+                return chromosome
+        return None
+
+    def __str__(self):
+        return ("Evaluation pool: " + str(self.timeouts) + " fitness tests timed out, " + str(self.crashes) +
+                " crashed, " + str(self.restarts) + " workers restarted")
+
+    def shutdown(self):
+        """
+        Stop all of the worker processes.  Workers that are still busy, with submitted chromosomes or with work left
+        behind by an interrupted evaluate, are killed.  Idle workers are asked to exit and killed if they have not done
+        so within SHUTDOWN_TIMEOUT seconds
+        """
+        self.submitted = {}
+        for workerId, p in enumerate(self.workers):
+            if workerId in self.idle:
+                try:
+                    self.connections[workerId].send(None)
+                except IOError:
+                    pass
+            elif p.is_alive():
+                p.terminate()
+        deadline = time.time() + self.SHUTDOWN_TIMEOUT
+        for p in self.workers:
+            p.join(max(0.0, deadline - time.time()))
+            if p.is_alive():
+                p.terminate()
+                p.join()
+        for connection in self.connections:
+            connection.close()
+        self.workers = []
+        self.connections = []
+        self.idle = []
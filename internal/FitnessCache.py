@@ -0,0 +1,82 @@
+import cPickle
+from collections import OrderedDict
+
+class FitnessCache(object):
+    """
+    Remembers the fitness of recently tested genomes so that chromosomes with identical genes are only tested once.
+
+    Entries are keyed by the gene values of a chromosome.  When the cache is full the least recently used entry is
+    evicted
+    """
+
+    def __init__(self, maxEntries):
+        """
+        :param maxEntries: the maximum number of genomes to remember
+        :type maxEntries: int
+        """
+        if maxEntries < 1:
+            raise Exception("maxEntries must be at least 1")
+        self.maxEntries = maxEntries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def makeKey(self, chromosome):
+        """
+        Return a hashable key made from the gene values of a chromosome
+        """
+        key = tuple(chromosome.getValues())
+        try:
+            hash(key)
+        except TypeError:
+            #unhashable gene values are compared by their serialized form
+            key = cPickle.dumps(key, 2)
+        return key
+
+    def store(self, key, fitness):
+        if key in self.entries:
+            del self.entries[key]
+        elif len(self.entries) >= self.maxEntries:
+            self.entries.popitem(last=False)
+        self.entries[key] = fitness
+
+    def evaluate(self, chromosomes, test):
+        """
+        Measure the fitness of the given chromosomes.  Chromosomes found in the cache, or identical to another chromosome
+        in the list, are not tested
+        :type chromosomes: [Chromosome]
+        :param test: called with the list of chromosomes that must be tested.  May return the chromosomes whose
+                        fitness test failed, their fitness is not a real measurement and is not remembered
+        :type test: ([Chromosome]) -> [Chromosome]
+        """
+        untested = []
+        untestedKeys = []
+        firstWithKey = {}
+        duplicates = []
+        for chromosome in chromosomes:
+            key = self.makeKey(chromosome)
+            if key in self.entries:
+                self.hits += 1
+                fitness = self.entries.pop(key)
+                self.entries[key] = fitness
+                chromosome.setFitness(fitness)
+            elif key in firstWithKey:
+                self.hits += 1
+                duplicates.append((chromosome, firstWithKey[key]))
+            else:
+                self.misses += 1
+                firstWithKey[key] = chromosome
+                untested.append(chromosome)
+                untestedKeys.append(key)
+
+        failed = set(id(chromosome) for chromosome in test(untested) or [])
+
+        for key, chromosome in zip(untestedKeys, untested):
+            if id(chromosome) not in failed:
+                self.store(key, chromosome.fitness)
+        for chromosome, original in duplicates:
+            chromosome.setFitness(original.fitness)
+
+    def __str__(self):
+        return ("Fitness cache: " + str(self.hits) + " hits, " + str(self.misses) + " misses, " +
+                str(len(self.entries)) + " entries")
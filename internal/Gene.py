@@ -1,19 +1,19 @@
-import copy
-
 class Gene(object):
     """
     An instance of a gene
     """
 
+    __slots__ = ("geneType", "value")
+
     def __init__(self, geneType, value):
         self.geneType = geneType
         self.value = value
 
     def copy(self):
         """
-        Return a deep copy of this gene
+        Return a copy of this gene.  Values of immutable gene types are shared, others are copied
         """
-        return Gene(self.geneType, copy.deepcopy(self.value))
+        return Gene(self.geneType, self.geneType.copyValue(self.value))
 
     def mutate(self, chromosome):
         """
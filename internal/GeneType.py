@@ -1,3 +1,5 @@
+import copy
+
 from Gene import *
 
 class GeneType(object):
@@ -5,7 +7,9 @@ class GeneType(object):
     This class represents a category of genes.  For example, it could represent an integer gene
     """
 
-    def __init__(self, generator, mutator, description, combiner=None):
+    def __init__(self, generator, mutator, description, combiner=None, dtype=None, columnGenerator=None,
+                 columnMutator=None, encoder=None, decoder=None, copier=None,
+                 immutable=False):
         """
         :param generator: this function should return a random value.  The type of this value is the type of the gene
         :type generator: () -> type_of_gene
@@ -16,11 +20,37 @@ class GeneType(object):
         :param combiner: An optinal function.  If provided, this function is used when crossing over two genes
                             Useful for when crossover needs to be more complex than "chose one or the other"
         :type combiner: (Gene, Gene) -> Gene
+        :param dtype: An optional numpy dtype name for the values of this gene.  Gene types that provide a dtype, a
+                            columnGenerator and a columnMutator can be stored in an ArrayGeneration
+        :type dtype: str
+        :param columnGenerator: An optional function returning a numpy array of n random values
+        :type columnGenerator: (int) -> numpy.ndarray
+        :param columnMutator: An optional function that mutates every value of a numpy array once and returns the
+                            result.  The second argument maps gene descriptions to the values of the same individuals,
+                            it is the column equivalent of the chromosome passed to mutator
+        :type columnMutator: (numpy.ndarray, ColumnSelection) -> numpy.ndarray
+        :param encoder: An optional function converting a value into a YAML friendly form, used by Chromosome.data
+        :type encoder: (type_of_gene) -> object
+        :param decoder: The inverse of encoder, used when chromosomes are read back
+        :type decoder: (object) -> type_of_gene
+        :param copier: An optional function returning an independent copy of a value, used instead of copy.deepcopy
+                            when genes are copied
+        :type copier: (type_of_gene) -> type_of_gene
+        :param immutable: True if values of this type are never changed in place, for example numbers, strings or
+                            tuples.  Copies of genes then share the value instead of copying it, and copier is not used
+        :type immutable: bool
         """
         self.generator = generator
         self.mutator = mutator
         self.description = description
         self.combiner = combiner
+        self.dtype = dtype
+        self.columnGenerator = columnGenerator
+        self.columnMutator = columnMutator
+        self.encoder = encoder
+        self.decoder = decoder
+        self.copier = copier
+        self.immutable = immutable
 
     def getRandomGene(self):
         """
@@ -29,5 +59,40 @@ class GeneType(object):
         """
         return Gene(self, self.generator())
 
+    def copyValue(self, value):
+        """
+        Return a copy of a value of this gene type that can be mutated without affecting the original.  Immutable
+        values are returned as they are
+        """
+        if self.immutable:
+            return value
+        if self.copier is None:
+            return copy.deepcopy(value)
+        return self.copier(value)
+
+    def encode(self, value):
+        """
+        Return the YAML friendly form of a value of this gene type
+        """
+        if self.encoder is None:
+            return value
+        return self.encoder(value)
+
+    def decode(self, data):
+        """
+        Return the value stored in the YAML friendly form data, see encode
+        """
+        if self.decoder is None:
+            return data
+        return self.decoder(data)
+
+    def supportsColumns(self):
+        """
+        Return True if genes of this type can be stored and bred as numpy columns
+        :rtype: bool
+        """
+        return (self.dtype is not None and self.columnGenerator is not None and self.columnMutator is not None and
+                self.combiner is None)
+
     def __str__(self):
         return self.description + "   (" + str(type(self.generator())) + ")"
\ No newline at end of file
@@ -1,6 +1,8 @@
-from multiprocessing import Process, Array
+import heapq
 
-from BreedingPool import *
+from ColumnMutation import *
+from EvaluationPool import *
+from Selection import *
 
 class Generation():
     """
@@ -10,6 +12,8 @@ class Generation():
     def __init__(self, generationType, population):
         self.generationType = generationType
         self.population = population
+        #the most fit individual and fitness statistics, calculated when first needed
+        self.statistics = None
 
     def copy(self):
         """
@@ -21,7 +25,16 @@ class Generation():
             newPopulation.append(chromosome.copy())
         return Generation(self.generationType, newPopulation)
 
-    def getNextGeneration(self, size, elitism, randIndividuals, randFitness, mutationRate, mutationSTDEV):
+    def addChromosomes(self, chromosomes):
+        """
+        Add individuals to this generation
+        :type chromosomes: [Chromosome]
+        """
+        self.population += chromosomes
+        self.statistics = None
+
+    def getNextGeneration(self, size, elitism, randIndividuals, randFitness, mutationRate, mutationSTDEV,
+                          selection=BreedingPool):
         """
         Return a new generation of individuals.  To get multithreading, call doFitnessTests before this function
         :param size: the size of the new generation
@@ -37,6 +50,8 @@ class Generation():
         :type mutationRate: float
         :param mutationSTDEV: the standard deviation for the number of mutations each gene will undergo
         :type mutationSTDEV: float
+        :param selection: creates the breeding pool that parents are drawn from, see Selection.getSelection
+        :type selection: (population, fitness) -> BreedingPool
         :rtype: Generation
         """
 
@@ -60,81 +75,131 @@ class Generation():
             breedingPopulation.append(rando)
 
         #breed a new generation of chromosomes
-        breedingPool = BreedingPool(breedingPopulation)
-        while len(newPopulation) < size:
-            newChromosome = breedingPool.get() + breedingPool.get()
-            newChromosome.mutate(mutationRate, mutationSTDEV)
-            newPopulation.append(newChromosome)
+        breedingPool = selection(breedingPopulation)
+        children = size - len(newPopulation)
+        parents = breedingPool.getMany(2 * max(children, 0))
+        offspring = [parents[2 * index] + parents[2 * index + 1] for index in xrange(children)]
+        #gene types with column mutators are mutated for all children at once, unless few genes are mutated
+        if prefersColumnMutation(self.generationType.chromosomeType, mutationRate, mutationSTDEV):
+            mutateChromosomes(offspring, mutationRate, mutationSTDEV)
+        else:
+            for newChromosome in offspring:
+                newChromosome.mutate(mutationRate, mutationSTDEV)
+        newPopulation += offspring
 
         return Generation(self.generationType, newPopulation)
 
 
 
-    def doFitnessTests(self, threads=1):
+    def doFitnessTests(self, threads=1, pool=None, cache=None):
         """
-        Measure the fitness of each chromosome (if the chromosome has not been previously measured)
+        Measure the fitness of each chromosome whose genes have changed since its fitness was last measured.  If the
+        chromosome type has a batch fitness function then it is used to test the whole generation at once
         :param threads: the number of theads to use on this operation
+        :param pool: if provided, the fitness tests are run by these persistent worker processes instead of starting
+                        new processes
+        :type pool: EvaluationPool
+        :param cache: if provided, chromosomes whose genes are found in the cache are not tested again
+        :type cache: FitnessCache
         """
-                
-        if threads <= 1:
-            for chromosome in self.population:
+        self.statistics = None
+        dirty = [chromosome for chromosome in self.population if chromosome.dirty]
+        if cache is None:
+            self.testChromosomes(dirty, threads, pool)
+        else:
+            cache.evaluate(dirty, lambda chromosomes: self.testChromosomes(chromosomes, threads, pool))
+
+    def testChromosomes(self, chromosomes, threads=1, pool=None):
+        """
+        Measure the fitness of some of the chromosomes of this generation.  See doFitnessTests
+        :type chromosomes: [Chromosome]
+        :return: the chromosomes given a failure fitness because their fitness test crashed or took too long
+        :rtype: [Chromosome]
+        """
+        if len(chromosomes) == 0:
+            return []
+
+        chromosomeType = self.generationType.chromosomeType
+        if chromosomeType.batchFitnessFunction is not None:
+            chromosomeType.doBatchFitnessTests(chromosomes)
+        elif pool is not None:
+            return pool.evaluate(chromosomes)
+        elif threads <= 1:
+            for chromosome in chromosomes:
                 chromosome.doFitnessTest()
         else:
-            fitness_calculation_result = Array('d', len(self.population))
-            def testFunct(chromosomes, start, end):
-                print end - start
-                index = start;
-                while index < end:
-                    chromosomes[index].doFitnessTest()
-                    fitness_calculation_result[index] = chromosomes[index].fitness
-                    index += 1                
-            
-            # --- Commented by MR. I do not understand why we do this work twice: 
-            # --- 1 in common, second in treads (in testFunct)
-            #for chromosome in self.population:
-            #    chromosome.doFitnessTest()
-
-            procs = []
-            begin = 0          
-            chunksize = int(math.floor(len(self.population) / threads))
-            for t in xrange(threads):
-                p = None
-                if t+1 == threads: #if it is the last thread then give it all remaining
-                    p = Process(target=testFunct, args=(self.population,begin,len(self.population)))
-                else:
-                    p = Process(target=testFunct, args=(self.population,begin,begin+chunksize))
-                p.start()
-                begin += chunksize
-                procs.append(p)
-            for p in procs:
-                p.join()
-            # Added by MR Using shared array to get caclulated data in main thread
-            for i in xrange(len(self.population)):
-                self.population[i].fitness = fitness_calculation_result[i]
-                
+            #start worker processes for these chromosomes only
+            pool = EvaluationPool(chromosomeType, threads)
+            try:
+                return pool.evaluate(chromosomes)
+            finally:
+                pool.shutdown()
+        return []
+
+    def getStatistics(self):
+        """
+        Return the most fit individual and a summary of the fitness of this generation.  They are calculated in a
+        single pass and kept until the generation changes
+        :return: a dict with the keys "mostFit" (None if no individual is more than "0 fit"), "max", "min", "mean"
+                    and "count", the number of individuals with a measured fitness
+        :rtype: dict
+        """
+        if self.statistics is None:
+            mostFit = None
+            maximum = None
+            minimum = None
+            total = 0.0
+            count = 0
+            for chromosome in self.population:
+                fitness = chromosome.getFitness()
+                if fitness is None or chromosome.perfectMatch:
+                    continue
+                if maximum is None or fitness > maximum:
+                    maximum = fitness
+                    if fitness > 0:
+                        mostFit = chromosome
+                if minimum is None or fitness < minimum:
+                    minimum = fitness
+                total += fitness
+                count += 1
+            mean = None
+            if count > 0:
+                mean = total / count
+            self.statistics = {"mostFit": mostFit, "max": maximum, "min": minimum, "mean": mean, "count": count}
+        return self.statistics
+
     def getMostFit(self):
         """
         Return the most fit individual in a generation.  Returns None if no individual is more than "0 fit"
         :rtype: Chromosome
         """
-        mostFit = -1
-        rVal = None
-        for chromosome in self.population:
-            fitness = chromosome.getFitness
-            if fitness > 0 and fitness > mostFit:
-                mostFit = fitness
-                rVal = chromosome
-        return rVal
+        return self.getStatistics()["mostFit"]
 
     def getNMostFit(self, N):
         """
-        Return the N members of this generation that have the highest fitness
+        Return the N members of this generation that have the highest fitness, least fit first
         :rtype: [Chromosome]
         """
-        if N == 0:
+        if N <= 0:
             return []
-        self.population = sorted(self.population)
-        return self.population[-1 * N:]
+        mostFit = heapq.nlargest(N, self.population, key=lambda chromosome: chromosome.getFitness())
+        mostFit.reverse()
+        return mostFit
+
+    def replaceLeastFit(self, chromosomes):
+        """
+        Replace the least fit members of this generation with the given chromosomes.  The size of the generation does
+        not change, if more chromosomes are given than the generation holds then the last ones are used
+        :type chromosomes: [Chromosome]
+        """
+        count = min(len(chromosomes), len(self.population))
+        if count == 0:
+            return
+        leastFit = heapq.nsmallest(count, xrange(len(self.population)),
+                                   key=lambda index: self.population[index].getFitness())
+        for index, chromosome in zip(leastFit, chromosomes[-1 * count:]):
+            self.population[index] = chromosome
+        self.statistics = None
 
     def data(self):
         """
@@ -1,5 +1,7 @@
 import yaml
 
+from ArrayGeneration import *
+from Checkpoint import *
 from Generation import *
 
 class GenerationType(object):
@@ -7,8 +9,21 @@ class GenerationType(object):
     This class represents a type of a population of individuals
     """
 
-    def __init__(self, chromosomeType):
+    def __init__(self, chromosomeType, arrayPopulation=False):
+        """
+        :param chromosomeType: the type of the individuals in generations of this type
+        :type chromosomeType: ChromosomeType
+        :param arrayPopulation: if True, generations store gene values in numpy columns (see ArrayGeneration)
+        :type arrayPopulation: bool
+        """
+        if arrayPopulation:
+            if numpy is None:
+                raise Exception("numpy is required for an array population")
+            for gType in chromosomeType.geneTypes:
+                if not gType.supportsColumns():
+                    raise Exception("Gene type " + str(gType.description) + " cannot be stored in an array population")
         self.chromosomeType = chromosomeType
+        self.arrayPopulation = arrayPopulation
 
     def getRandomGeneration(self, size):
         """
@@ -16,14 +31,52 @@ class GenerationType(object):
         :param size:
         :rtype: Generation
         """
+        if self.arrayPopulation:
+            return ArrayGeneration(self, [gType.columnGenerator(size) for gType in self.chromosomeType.geneTypes])
         newPopulation = []
         for i in xrange(size):
             newPopulation.append(self.chromosomeType.getRandomChromosome())
         return Generation(self, newPopulation)
 
     def fromYAML(self, data):
-        data = yaml.load(data)
+        return self.fromData(yaml.load(data))
+
+    def fromData(self, data):
+        """
+        Convert the data of a generation, as returned by Generation.data, into a generation
+        :rtype: Generation
+        """
         newPopulation = []
-        for key in data:
+        for key in sorted(data, key=int):
             newPopulation.append(self.chromosomeType.fromYAML(data[key]))
-        return Generation(self, newPopulation)
\ No newline at end of file
+        return self.makeGeneration(newPopulation)
+
+    def fromCheckpoint(self, source):
+        """
+        Open a binary checkpoint written by FileManager.writeCheckpoint.  The gene values are memory mapped instead of
+        being read and parsed, an array population uses the mapped columns directly
+        :type source: str
+        :rtype: Generation
+        """
+        columns, fitness = openCheckpoint(source, self.chromosomeType.geneTypes)
+        if self.arrayPopulation:
+            return ArrayGeneration(self, columns, fitness)
+
+        newPopulation = []
+        for index in xrange(len(fitness)):
+            chromosome = self.chromosomeType.fromValues([column.item(index) for column in columns])
+            if not numpy.isnan(fitness[index]):
+                chromosome.fitness = fitness.item(index)
+                chromosome.dirty = False
+            newPopulation.append(chromosome)
+        return Generation(self, newPopulation)
+
+    def makeGeneration(self, population):
+        """
+        Create a generation of this type from a list of chromosomes
+        :type population: [Chromosome]
+        :rtype: Generation
+        """
+        if self.arrayPopulation:
+            return ArrayGeneration.fromChromosomes(self, population)
+        return Generation(self, population)
\ No newline at end of file
@@ -0,0 +1,119 @@
+from Queue import Empty
+
+
+MIGRATION_TOPOLOGIES = ("ring", "full")
+
+
+def migrationTargets(island, islands, topology):
+    """
+    Return the islands that an island sends its migrants to
+    :param island: the index of the sending island
+    :param islands: the number of islands
+    :param topology: "ring" sends to the next island only, "full" sends to every other island
+    :rtype: [int]
+    """
+    if topology == "ring":
+        if islands < 2:
+            return []
+        return [(island + 1) % islands]
+    if topology == "full":
+        return [other for other in xrange(islands) if other != island]
+    raise Exception("Unknown migration topology: " + str(topology))
+
+
+class Migration(object):
+    """
+    Connects an island to the other islands of an island model run.
+
+    Every island has an inbox, a multiprocessing Queue shared by all islands.  Every interval generations an island
+    sends copies of its most fit individuals to the inboxes of its neighbours, then takes whatever has arrived in its
+    own inbox without waiting and uses it to replace its least fit individuals.  Only gene values and fitness values
+    are sent.
+
+    The islands share an event that is set when any island finishes, the others stop at their next generation
+    """
+
+    def __init__(self, island, inboxes, stopEvent, topology="ring", interval=10, migrants=1):
+        """
+        :param island: the index of this island
+        :param inboxes: the inbox of every island
+        :type inboxes: [multiprocessing.Queue]
+        :param stopEvent: set when any island has finished
+        :type stopEvent: multiprocessing.Event
+        :param topology: "ring" or "full", see migrationTargets
+        :param interval: the number of generations between migrations
+        :type interval: int
+        :param migrants: the number of individuals sent to each neighbour
+        :type migrants: int
+        """
+        if interval < 1:
+            raise Exception("The migration interval must be at least 1")
+        self.island = island
+        self.inboxes = inboxes
+        self.stopEvent = stopEvent
+        self.targets = migrationTargets(island, len(inboxes), topology)
+        self.interval = interval
+        self.migrants = migrants
+        self.sent = 0
+        self.received = 0
+
+    def detach(self):
+        """
+        Called in the process of the island.  Migrants that have not been delivered when the island finishes are
+        discarded, an island never waits for a neighbour that has already stopped
+        """
+        for inbox in self.inboxes:
+            inbox.cancel_join_thread()
+
+    def send(self, generation):
+        """
+        Send copies of the most fit individuals of a generation to the neighbours of this island
+        """
+        migrants = [(chromosome.getValues(), chromosome.fitness) for chromosome in generation.getNMostFit(self.migrants)]
+        if len(migrants) == 0:
+            return
+        for target in self.targets:
+            self.inboxes[target].put(migrants)
+            self.sent += len(migrants)
+
+    def receive(self, chromosomeType):
+        """
+        Take every migrant that has arrived so far, without waiting
+        :type chromosomeType: ChromosomeType
+        :rtype: [Chromosome]
+        """
+        immigrants = []
+        inbox = self.inboxes[self.island]
+        while True:
+            try:
+                migrants = inbox.get_nowait()
+            except Empty:
+                break
+            for values, fitness in migrants:
+                chromosome = chromosomeType.fromValues(values)
+                if fitness is not None:
+                    chromosome.fitness = fitness
+                    chromosome.dirty = False
+                immigrants.append(chromosome)
+        self.received += len(immigrants)
+        return immigrants
+
+    def migrate(self, generation):
+        """
+        Exchange migrants with the neighbouring islands.  Immigrants replace the least fit members of the generation
+        """
+        self.send(generation)
+        immigrants = self.receive(generation.generationType.chromosomeType)
+        if len(immigrants) > 0:
+            #keep the most fit immigrants if more have arrived than the generation can hold
+            immigrants.sort(key=lambda chromosome: chromosome.fitness)
+            generation.replaceLeastFit(immigrants)
+
+    def stop(self):
+        self.stopEvent.set()
+
+    def stopped(self):
+        return self.stopEvent.is_set()
+
+    def __str__(self):
+        return "Island " + str(self.island) + ": " + str(self.sent) + " migrants sent, " + str(self.received) + " received"
@@ -0,0 +1,145 @@
+import bisect
+import math
+import random
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def countDistribution(mutationRate, mutationSTDEV):
+    """
+    Return the probability that a gene is mutated k times by Chromosome.mutate, for k = 0, 1, 2...
+
+    Chromosome.mutate draws x from a normal distribution, mutates the gene floor(x) times and once more with
+    probability mutationRate - floor(x).  A negative number of mutations means no mutations
+    :rtype: [float]
+    """
+    stdev = abs(mutationSTDEV)
+    #(number of mutations, probability)
+    outcomes = []
+    if stdev == 0:
+        whole = int(math.floor(mutationRate))
+        extra = min(max(mutationRate - whole, 0.0), 1.0)
+        outcomes.append((whole, 1.0 - extra))
+        outcomes.append((whole + 1, extra))
+    else:
+        def normalCDF(value):
+            return 0.5 * (1.0 + math.erf((value - mutationRate) / (stdev * math.sqrt(2.0))))
+        low = int(math.floor(mutationRate - 10 * stdev))
+        high = int(math.ceil(mutationRate + 10 * stdev))
+        #anything further out than 10 standard deviations is counted as the lowest outcome
+        outcomes.append((low, normalCDF(low)))
+        for whole in xrange(low, high + 1):
+            probability = normalCDF(whole + 1) - normalCDF(whole)
+            extra = min(max(mutationRate - whole, 0.0), 1.0)
+            outcomes.append((whole, probability * (1.0 - extra)))
+            outcomes.append((whole + 1, probability * extra))
+
+    distribution = [0.0] * (max(max(count for count, probability in outcomes), 0) + 1)
+    for count, probability in outcomes:
+        distribution[max(count, 0)] += probability
+    total = sum(distribution)
+    return [probability / total for probability in distribution]
+
+
+class MutationSampler(object):
+    """
+    Chooses which genes are mutated, and how many times, without drawing random numbers for genes that are not.
+
+    Each gene is mutated at least once with probability touchProbability.  The distance to the next mutated gene is
+    drawn from a geometric distribution, so only the mutated genes are visited, then the number of mutations of each
+    is drawn from the distribution of countDistribution given that it is at least one.  The result has the same
+    distribution as Chromosome.mutate visiting every gene
+    """
+
+    def __init__(self, mutationRate, mutationSTDEV):
+        distribution = countDistribution(mutationRate, mutationSTDEV)
+        self.touchProbability = 1.0 - distribution[0]
+        #cumulative probability of 1, 2, 3... mutations for a gene that is mutated
+        self.cumulative = []
+        total = 0.0
+        for probability in distribution[1:]:
+            total += probability
+            self.cumulative.append(total)
+        if total > 0:
+            self.cumulative = [value / total for value in self.cumulative]
+        self.logMiss = None
+        if 0 < self.touchProbability < 1:
+            self.logMiss = math.log(1.0 - self.touchProbability)
+
+    def getCount(self):
+        """
+        Return the number of mutations of a gene that is mutated at least once
+        :rtype: int
+        """
+        return min(bisect.bisect_right(self.cumulative, random.random()), len(self.cumulative) - 1) + 1
+
+    def sample(self, genes):
+        """
+        Return the genes of a chromosome that are mutated
+        :param genes: the number of genes in the chromosome
+        :return: (index, number of mutations) tuples, in order of index
+        """
+        if self.touchProbability <= 0:
+            return []
+        if self.logMiss is None:
+            return [(index, self.getCount()) for index in xrange(genes)]
+        mutations = []
+        index = -1
+        while True:
+            #the number of genes skipped before the next mutated gene
+            index += 1 + int(math.log(1.0 - random.random()) / self.logMiss)
+            if index >= genes:
+                return mutations
+            mutations.append((index, self.getCount()))
+
+    def sampleColumns(self, genes, rows):
+        """
+        Choose the mutated genes of many chromosomes at once, using numpy
+        :param genes: the number of genes in each chromosome
+        :param rows: the number of chromosomes
+        :return: (gene index, rows, number of mutations) tuples, in order of gene index, for each gene that has at
+                    least one mutation
+        """
+        total = genes * rows
+        if self.touchProbability <= 0 or total == 0:
+            return []
+        if self.logMiss is None:
+            positions = numpy.arange(total)
+        else:
+            parts = []
+            position = -1
+            while position < total:
+                expected = (total - position) * self.touchProbability
+                gaps = numpy.random.geometric(self.touchProbability, int(expected + 4 * math.sqrt(expected) + 16))
+                found = position + numpy.cumsum(gaps)
+                parts.append(found[found < total])
+                position = found[-1]
+            positions = numpy.concatenate(parts)
+        counts = numpy.searchsorted(self.cumulative, numpy.random.random(len(positions)), side="right")
+        counts = numpy.minimum(counts, len(self.cumulative) - 1) + 1
+
+        #positions are gene major, so the positions of each gene are contiguous
+        geneIndices = positions // rows
+        bounds = numpy.searchsorted(geneIndices, numpy.arange(genes + 1))
+        result = []
+        for gene in numpy.unique(geneIndices):
+            start, end = bounds[gene], bounds[gene + 1]
+            result.append((int(gene), positions[start:end] % rows, counts[start:end]))
+        return result
+
+
+samplers = {}
+
+
+def getMutationSampler(mutationRate, mutationSTDEV):
+    """
+    Return a MutationSampler, samplers are shared between calls with the same settings
+    :rtype: MutationSampler
+    """
+    key = (mutationRate, mutationSTDEV)
+    if key not in samplers:
+        samplers[key] = MutationSampler(mutationRate, mutationSTDEV)
+    return samplers[key]
@@ -0,0 +1,114 @@
+import random
+from array import array
+
+
+#the values of a permutation of length n are the integers 0 to n - 1, stored in an array of this type code
+PERMUTATION_TYPECODE = "i"
+
+PERMUTATION_MUTATIONS = ("swap", "inversion", "scramble")
+PERMUTATION_CROSSOVERS = ("order", "pmx")
+
+
+def randomPermutation(length):
+    """
+    :rtype: array.array
+    """
+    values = range(length)
+    random.shuffle(values)
+    return array(PERMUTATION_TYPECODE, values)
+
+
+def randomSegment(length):
+    """
+    Return the bounds (start, end) of a random slice of at least two positions
+    """
+    start, end = sorted(random.sample(xrange(length + 1), 2))
+    if end - start < 2:
+        if end < length:
+            end += 1
+        else:
+            start -= 1
+    return start, end
+
+
+def swapMutation(permutation):
+    """
+    Return a copy of a permutation with two of its positions exchanged
+    """
+    child = permutation[:]
+    first, second = random.sample(xrange(len(child)), 2)
+    child[first], child[second] = child[second], child[first]
+    return child
+
+
+def inversionMutation(permutation):
+    """
+    Return a copy of a permutation with a random slice reversed
+    """
+    child = permutation[:]
+    start, end = randomSegment(len(child))
+    child[start:end] = permutation[start:end][::-1]
+    return child
+
+
+def scrambleMutation(permutation):
+    """
+    Return a copy of a permutation with a random slice shuffled
+    """
+    child = permutation[:]
+    start, end = randomSegment(len(child))
+    segment = permutation[start:end].tolist()
+    random.shuffle(segment)
+    child[start:end] = array(PERMUTATION_TYPECODE, segment)
+    return child
+
+
+def orderCrossover(parentA, parentB):
+    """
+    Order crossover (OX).  The child keeps a random slice of parentA in place, the remaining positions are filled with
+    the other values in the order they appear in parentB, starting after the slice.  Runs in O(n)
+    """
+    length = len(parentA)
+    start, end = sorted(random.sample(xrange(length + 1), 2))
+    taken = bytearray(length)
+    for value in parentA[start:end]:
+        taken[value] = 1
+    rest = [value for value in parentB[end:].tolist() + parentB[:end].tolist() if not taken[value]]
+
+    child = parentA[:]
+    child[end:] = array(PERMUTATION_TYPECODE, rest[:length - end])
+    child[:start] = array(PERMUTATION_TYPECODE, rest[length - end:])
+    return child
+
+
+def pmxCrossover(parentA, parentB):
+    """
+    Partially mapped crossover (PMX).  The child keeps a random slice of parentA in place, values of parentB outside
+    the slice are kept where they do not clash with it.  Runs in O(n)
+    """
+    length = len(parentA)
+    start, end = sorted(random.sample(xrange(length + 1), 2))
+    child = parentB[:]
+    #the position of every value in the child
+    positions = array(PERMUTATION_TYPECODE, [0]) * length
+    for index, value in enumerate(child):
+        positions[value] = index
+    for index in xrange(start, end):
+        value = parentA[index]
+        other = positions[value]
+        displaced = child[index]
+        child[index], child[other] = value, displaced
+        positions[value], positions[displaced] = index, other
+    return child
+
+
+def isPermutation(values):
+    """
+    Return True if values holds each of the integers 0 to len(values) - 1 once
+    """
+    seen = bytearray(len(values))
+    for value in values:
+        if not 0 <= value < len(values) or seen[value]:
+            return False
+        seen[value] = 1
+    return True
@@ -0,0 +1,28 @@
+from BreedingPool import *
+
+class RankPool(BreedingPool):
+    """
+    A breeding pool that selects chromosomes in proportion to their rank instead of their fitness.  The least fit
+    chromosome has weight 1, the most fit has weight n.
+
+    The ranks are computed once, when the pool is created.  After that selection works exactly like BreedingPool
+    """
+
+    def __init__(self, population, fitness=None):
+        """
+        :param population: the chromosomes that may be selected
+        :param fitness: the fitness of each member of the population.  If None, getFitness() is used
+        :type fitness: [float]
+        """
+        if fitness is None:
+            fitness = [chromosome.getFitness() for chromosome in population]
+
+        if numpy is not None:
+            ranks = numpy.empty(len(fitness))
+            ranks[numpy.argsort(numpy.asarray(fitness, dtype=float), kind="mergesort")] = numpy.arange(1, len(fitness) + 1)
+        else:
+            ranks = [0] * len(fitness)
+            for rank, index in enumerate(sorted(xrange(len(fitness)), key=lambda i: fitness[i])):
+                ranks[index] = rank + 1
+
+        BreedingPool.__init__(self, population, ranks)
@@ -0,0 +1,31 @@
+from BreedingPool import *
+from RankPool import *
+from TournamentPool import *
+from UniversalSamplingPool import *
+
+
+SELECTION_STRATEGIES = ("proportional", "tournament", "rank", "sus")
+
+
+def getSelection(selection, tournamentSize=2):
+    """
+    Return a function that creates a breeding pool for a selection strategy
+    :param selection: "proportional" (fitness proportional), "tournament", "rank" or "sus" (stochastic universal
+                        sampling).  A function is returned unchanged, so custom strategies can be plugged in
+    :param tournamentSize: the number of chromosomes competing in each tournament
+    :type tournamentSize: int
+    :rtype: (population, fitness) -> BreedingPool
+    """
+    if callable(selection):
+        return selection
+    if selection == "proportional":
+        return BreedingPool
+    if selection == "rank":
+        return RankPool
+    if selection == "sus":
+        return UniversalSamplingPool
+    if selection == "tournament":
+        def makeTournamentPool(population, fitness=None):
+            return TournamentPool(population, fitness, tournamentSize)
+        return makeTournamentPool
+    raise Exception("Unknown selection strategy: " + str(selection))
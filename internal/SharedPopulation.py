@@ -0,0 +1,105 @@
+import ctypes
+from multiprocessing.sharedctypes import RawArray
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+#the shared memory type used for each gene dtype
+CTYPES = {"float64": ctypes.c_double,
+          "float32": ctypes.c_float,
+          "int64": ctypes.c_int64,
+          "int32": ctypes.c_int32,
+          "int16": ctypes.c_int16,
+          "int8": ctypes.c_int8,
+          "uint8": ctypes.c_uint8,
+          "bool": ctypes.c_bool}
+
+
+def supportsSharedMemory(geneTypes):
+    """
+    Return True if the values of every gene type can be stored in shared memory
+    :type geneTypes: [GeneType]
+    """
+    for gType in geneTypes:
+        if gType.dtype not in CTYPES:
+            return False
+    return True
+
+
+class SharedPopulation(object):
+    """
+    Gene values and fitness values of the chromosomes being tested, stored in shared memory.
+
+    The memory is allocated before the worker processes are started, so every worker maps the same pages.  The
+    parent packs the gene values of up to capacity chromosomes into one column per gene type, workers read the values
+    of the rows they are given and write the fitness of each row back.  Only row numbers are sent between processes.
+
+    When numpy is available the columns are also viewed as numpy arrays, so whole columns are copied at once
+    """
+
+    def __init__(self, geneTypes, capacity):
+        """
+        :param geneTypes: the gene types of the chromosomes, every one must have a dtype listed in CTYPES
+        :type geneTypes: [GeneType]
+        :param capacity: the maximum number of chromosomes that can be packed at once
+        :type capacity: int
+        """
+        if not supportsSharedMemory(geneTypes):
+            raise Exception("Every gene type must have a numeric dtype to be stored in shared memory")
+        self.capacity = capacity
+        self.columns = [RawArray(CTYPES[gType.dtype], capacity) for gType in geneTypes]
+        self.fitness = RawArray(ctypes.c_double, capacity)
+        #True where the fitness function reported a perfect match
+        self.perfectMatch = RawArray(ctypes.c_bool, capacity)
+        self.views = None
+        if numpy is not None:
+            self.views = [numpy.ctypeslib.as_array(column) for column in self.columns]
+
+    def pack(self, chromosomes):
+        """
+        Copy the gene values of the chromosomes into rows 0 to len(chromosomes) - 1
+        :type chromosomes: [Chromosome]
+        """
+        if len(chromosomes) > self.capacity:
+            raise Exception("Only " + str(self.capacity) + " chromosomes fit in shared memory")
+        if len(chromosomes) == 0:
+            return
+        count = len(chromosomes)
+        generation = getattr(chromosomes[0], "generation", None)
+        if self.views is not None and generation is not None and \
+                all(getattr(chromosome, "generation", None) is generation for chromosome in chromosomes):
+            #views of an ArrayGeneration, copy the rows straight from its columns
+            rows = numpy.fromiter((chromosome.index for chromosome in chromosomes), dtype=int, count=count)
+            for view, column in zip(self.views, generation.columns):
+                view[:count] = column[rows]
+        else:
+            rows = [chromosome.getValues() for chromosome in chromosomes]
+            for column, values in zip(self.views or self.columns, zip(*rows)):
+                column[0:count] = values
+
+    def getRows(self, start, end):
+        """
+        Return the gene values of rows start to end - 1, one list per row
+        """
+        if self.views is not None:
+            return zip(*[view[start:end].tolist() for view in self.views])
+        return zip(*[column[start:end] for column in self.columns])
+
+    def setFitness(self, row, fitness):
+        if fitness is None:
+            self.perfectMatch[row] = True
+            self.fitness[row] = 0.0
+        else:
+            self.perfectMatch[row] = False
+            self.fitness[row] = fitness
+
+    def getFitness(self, row):
+        """
+        :return: the fitness of a row, None for a perfect match
+        """
+        if self.perfectMatch[row]:
+            return None
+        return self.fitness[row]
@@ -0,0 +1,156 @@
+import bisect
+import math
+import random
+
+from Selection import *
+
+
+class SteadyStatePopulation(object):
+    """
+    The population of a steady state run, where each new child replaces the least fit member.
+
+    The members are kept in a list of (fitness, index) pairs sorted by fitness, which gives the least fit member, the
+    most fit member and the rank of every member without a scan.  Parents are drawn from it directly instead of from a
+    breeding pool built for every child: tournaments and rank selection pick positions in the sorted list, fitness
+    proportional selection searches a Fenwick tree of fitness values that is updated on each replacement.  A custom
+    selection function still gets a new breeding pool for every child.
+
+    As in a generational run, only members with a fitness greater than 0 may be parents
+    """
+
+    def __init__(self, population, selection="proportional", tournamentSize=2):
+        """
+        :param population: tested chromosomes
+        :type population: [Chromosome]
+        :param selection: a selection strategy, see Selection.getSelection
+        :param tournamentSize: the number of chromosomes competing in each tournament
+        :type tournamentSize: int
+        """
+        if selection == "tournament" and tournamentSize < 1:
+            raise Exception("tournamentSize must be at least 1")
+        self.population = population
+        self.selection = selection
+        self.tournamentSize = tournamentSize
+        self.makePool = getSelection(selection, tournamentSize)
+        self.order = sorted((chromosome.fitness, index) for index, chromosome in enumerate(population))
+        self.tree = None
+        if selection in ("proportional", "sus"):
+            self.buildTree()
+
+    def __len__(self):
+        return len(self.population)
+
+    def getWeight(self, chromosome):
+        """
+        Return the weight of a member for fitness proportional selection
+        """
+        if chromosome.fitness > 0:
+            return float(chromosome.fitness)
+        return 0.0
+
+    def buildTree(self):
+        """
+        Build the Fenwick tree of weights, tree[i] holds the total weight of a range of members ending with member
+        i - 1.  It is rebuilt once per len(population) replacements so that rounding errors do not build up
+        """
+        size = len(self.population)
+        self.tree = [0.0] * (size + 1)
+        self.total = 0.0
+        for index, chromosome in enumerate(self.population):
+            weight = self.getWeight(chromosome)
+            self.total += weight
+            node = index + 1
+            self.tree[node] += weight
+            parent = node + (node & -node)
+            if parent <= size:
+                self.tree[parent] += self.tree[node]
+        self.topBit = 1
+        while self.topBit * 2 <= size:
+            self.topBit *= 2
+        self.updates = 0
+
+    def updateTree(self, index, change):
+        """
+        Add change to the weight of a member
+        """
+        self.total += change
+        node = index + 1
+        while node < len(self.tree):
+            self.tree[node] += change
+            node += node & -node
+        self.updates += 1
+        if self.updates >= len(self.population):
+            self.buildTree()
+
+    def findWeight(self, value):
+        """
+        Return the index of the member whose range of cumulative weight contains value
+        :rtype: int
+        """
+        tree = self.tree
+        size = len(tree)
+        index = 0
+        step = self.topBit
+        while step:
+            if index + step < size and tree[index + step] <= value:
+                index += step
+                value -= tree[index]
+            step >>= 1
+        return min(index, size - 2)
+
+    def getParents(self):
+        """
+        Select two parents
+        :rtype: [Chromosome]
+        """
+        size = len(self.order)
+        #the position in order of the least fit member that may be a parent
+        first = bisect.bisect_right(self.order, (0, size))
+        if first == size:
+            raise Exception("No individuals with a fitness greater than 0 are available for breeding")
+
+        if self.selection == "tournament":
+            positions = [max(random.randint(first, size - 1) for i in xrange(self.tournamentSize))
+                         for parent in xrange(2)]
+            return [self.population[self.order[position][1]] for position in positions]
+        if self.selection == "rank":
+            #the least fit parent has weight 1, the most fit has weight count
+            count = size - first
+            positions = []
+            for parent in xrange(2):
+                value = random.uniform(0, count * (count + 1) / 2.0)
+                rank = int(math.ceil((math.sqrt(8 * value + 1) - 1) / 2))
+                positions.append(first + min(max(rank, 1), count) - 1)
+            return [self.population[self.order[position][1]] for position in positions]
+        if self.selection == "proportional":
+            indices = [self.findWeight(random.uniform(0, self.total)) for parent in xrange(2)]
+            return [self.population[index] for index in indices]
+        if self.selection == "sus":
+            step = self.total / 2
+            start = random.uniform(0, step)
+            indices = [self.findWeight(start), self.findWeight(start + step)]
+            random.shuffle(indices)
+            return [self.population[index] for index in indices]
+
+        breedingPopulation = [chromosome for chromosome in self.population if chromosome.fitness > 0]
+        return self.makePool(breedingPopulation).getMany(2)
+
+    def replaceWeakest(self, child, elitism=0):
+        """
+        Replace the least fit member with a tested child.  The elitism most fit members are never replaced
+        :type child: Chromosome
+        """
+        if len(self.population) <= elitism:
+            return
+        fitness, index = self.order.pop(0)
+        weakest = self.population[index]
+        self.population[index] = child
+        if self.tree is not None:
+            self.updateTree(index, self.getWeight(child) - self.getWeight(weakest))
+        bisect.insort(self.order, (child.fitness, index))
+
+    def getMostFit(self):
+        """
+        :rtype: Chromosome
+        """
+        return self.population[self.order[-1][1]]
@@ -0,0 +1,155 @@
+import sys
+import threading
+import time
+from Queue import Empty, Queue as ResultQueue
+
+from Chromosome import *
+
+
+class ThreadEvaluator(object):
+    """
+    Measures fitness with many concurrent calls to the fitness function, each in its own thread of this process.
+
+    This suits fitness functions that spend most of their time waiting, for example on a socket, where forking worker
+    processes is wasteful.  At most concurrency tests run at once.  A test that takes longer than timeout seconds is
+    abandoned and the chromosome is given timeoutFitness, its thread is left to finish in the background and its result
+    is ignored.
+
+    The interface matches EvaluationPool, so it can be used wherever a pool is accepted
+    """
+
+    #the number of seconds shutdown waits for the threads of abandoned tests
+    SHUTDOWN_TIMEOUT = 5.0
+
+    def __init__(self, chromosomeType, concurrency, timeout=None, timeoutFitness=0.0):
+        """
+        :param chromosomeType: the type of the chromosomes that will be tested
+        :type chromosomeType: ChromosomeType
+        :param concurrency: the maximum number of fitness tests running at once
+        :type concurrency: int
+        :param timeout: the number of seconds a single fitness test may take.  None means no limit
+        :type timeout: float
+        :param timeoutFitness: the fitness given to a chromosome whose test took too long
+        :type timeoutFitness: float
+        """
+        if concurrency < 1:
+            raise Exception("concurrency must be at least 1")
+        if timeoutFitness is None:
+            raise Exception("timeoutFitness cannot be None")
+        self.chromosomeType = chromosomeType
+        #the name matches EvaluationPool, this is the number of tests that can run at once
+        self.processes = concurrency
+        self.timeout = timeout
+        self.timeoutFitness = timeoutFitness
+        self.results = ResultQueue()
+        #taskId -> (chromosome, deadline)
+        self.submitted = {}
+        self.threads = []
+        self.nextTaskId = 0
+        self.timeouts = 0
+        #chromosomes given timeoutFitness since evaluate was called
+        self.failed = []
+
+    def test(self, taskId, chromosome):
+        """
+        The body of a test thread.  Places (taskId, fitness, error) in the result queue
+        """
+        try:
+            fitness = self.chromosomeType.fitnessFunction(chromosome)
+        except Exception:
+            self.results.put((taskId, None, sys.exc_info()))
+        else:
+            self.results.put((taskId, fitness, None))
+
+    def submit(self, chromosome):
+        """
+        Start measuring the fitness of a single chromosome, without waiting for the result.  See collect
+        :type chromosome: Chromosome
+        :return: False if concurrency tests are already running
+        """
+        if len(self.submitted) >= self.processes:
+            return False
+        taskId = self.nextTaskId
+        self.nextTaskId += 1
+        deadline = None
+        if self.timeout is not None:
+            deadline = time.time() + self.timeout
+        self.submitted[taskId] = (chromosome, deadline)
+        thread = threading.Thread(target=self.test, args=(taskId, chromosome))
+        thread.daemon = True
+        thread.start()
+        self.threads = [running for running in self.threads if running.is_alive()]
+        self.threads.append(thread)
+        return True
+
+    def collect(self, timeout=0.1):
+        """
+        Wait up to timeout seconds for one of the submitted chromosomes to be tested, or to run out of time.  Raises
+        Chromosome.PerfectMatch if it is a perfect match, and any exception raised by the fitness function
+        :return: the tested chromosome, or None if no result arrived in time
+        :rtype: Chromosome
+        """
+        deadlines = [(deadline, taskId) for taskId, (chromosome, deadline) in self.submitted.iteritems()
+                     if deadline is not None]
+        wait = timeout
+        if deadlines:
+            wait = max(0.0, min(wait, min(deadlines)[0] - time.time()))
+
+        try:
+            taskId, fitness, error = self.results.get(True, wait)
+        except Empty:
+            if deadlines and min(deadlines)[0] <= time.time():
+                chromosome, deadline = self.submitted.pop(min(deadlines)[1])
+                self.timeouts += 1
+                self.failed.append(chromosome)
+                chromosome.setFitness(self.timeoutFitness)
+                return chromosome
+            return None
+
+        #the result of a test that has already run out of time
+        if taskId not in self.submitted:
+            return None
+        chromosome, deadline = self.submitted.pop(taskId)
+        if error is not None:
+            raise error[0], error[1], error[2]
+        chromosome.setFitness(fitness)
+        return chromosome
+
+    def evaluate(self, chromosomes):
+        """
+        Measure the fitness of each of the given chromosomes.  If a perfect match is found, the tests still running are
+        abandoned and Chromosome.PerfectMatch is raised
+        :type chromosomes: [Chromosome]
+        :return: the chromosomes that were given timeoutFitness because their fitness test took too long
+        :rtype: [Chromosome]
+        """
+        if self.submitted:
+            raise Exception("evaluate cannot be used while submitted chromosomes are being tested")
+        self.failed = []
+        pending = list(reversed(chromosomes))
+        try:
+            while pending or self.submitted:
+                while pending and self.submit(pending[-1]):
+                    pending.pop()
+                self.collect()
+        except Exception:
+            self.submitted.clear()
+            raise
+        return self.failed
+
+    def shutdown(self):
+        """
+        Abandon any tests that are still running.  Waits up to SHUTDOWN_TIMEOUT seconds, or timeout if it is shorter,
+        for their threads to finish, threads that are still running after that are daemon threads and are left behind
+        """
+        self.submitted.clear()
+        wait = self.SHUTDOWN_TIMEOUT
+        if self.timeout is not None:
+            wait = min(wait, self.timeout)
+        deadline = time.time() + wait
+        for thread in self.threads:
+            thread.join(max(0.0, deadline - time.time()))
+        self.threads = []
+
+    def __str__(self):
+        return "Thread evaluator: " + str(self.timeouts) + " fitness tests timed out"
@@ -0,0 +1,45 @@
+import random
+
+from BreedingPool import *
+
+class TournamentPool(BreedingPool):
+    """
+    A breeding pool that selects chromosomes with tournaments.  For each selection tournamentSize members of the
+    population are drawn at random and the most fit of them is chosen.
+
+    Only the order of the fitness values matters, so this works well when fitness values span many orders of magnitude.
+    Each selection costs O(tournamentSize), the population is never sorted or summed
+    """
+
+    def __init__(self, population, fitness=None, tournamentSize=2):
+        """
+        :param population: the chromosomes that may be selected
+        :param fitness: the fitness of each member of the population.  If None, getFitness() is used
+        :type fitness: [float]
+        :param tournamentSize: the number of chromosomes competing in each tournament
+        :type tournamentSize: int
+        """
+        if tournamentSize < 1:
+            raise Exception("tournamentSize must be at least 1")
+        self.population = population
+        if fitness is None:
+            fitness = [chromosome.getFitness() for chromosome in population]
+        if numpy is not None:
+            fitness = numpy.asarray(fitness, dtype=float)
+        self.fitness = fitness
+        self.tournamentSize = tournamentSize
+
+    def getIndex(self):
+        winner = random.randrange(len(self.fitness))
+        for i in xrange(self.tournamentSize - 1):
+            contender = random.randrange(len(self.fitness))
+            if self.fitness[contender] > self.fitness[winner]:
+                winner = contender
+        return winner
+
+    def getManyIndices(self, k):
+        if numpy is None:
+            return [self.getIndex() for i in xrange(k)]
+        contenders = numpy.random.randint(0, len(self.fitness), (k, self.tournamentSize))
+        winners = numpy.argmax(self.fitness[contenders], axis=1)
+        return contenders[numpy.arange(k), winners]
@@ -0,0 +1,27 @@
+import bisect
+import random
+
+from BreedingPool import *
+
+class UniversalSamplingPool(BreedingPool):
+    """
+    A breeding pool that uses stochastic universal sampling.  The probability of selecting a chromosome is proportional
+    to its fitness, as with BreedingPool, but a batch of k selections is made with k equally spaced pointers and a
+    single random offset.  This keeps the number of times each chromosome is chosen close to its expected value
+    """
+
+    def getManyIndices(self, k):
+        if k == 0:
+            return []
+        step = self.max / k
+        start = random.uniform(0, step)
+        if numpy is not None:
+            indices = numpy.searchsorted(self.cumulative, start + step * numpy.arange(k), side="right")
+            indices = numpy.minimum(indices, len(self.cumulative) - 1)
+            #the pointers select chromosomes in order, shuffle them so that parents are paired randomly
+            numpy.random.shuffle(indices)
+            return indices
+        indices = [min(bisect.bisect_right(self.cumulative, start + step * i), len(self.cumulative) - 1)
+                   for i in xrange(k)]
+        random.shuffle(indices)
+        return indices